@@ -8,6 +8,9 @@ Usage:
     python main.py <tweet_url>
     python main.py <tweet_url> --character nekira
     python main.py <tweet_url> --dry-run
+    python main.py --batch urls.txt --output results.jsonl --concurrency 4
+    cat urls.jsonl | python main.py --batch - --output results.jsonl
+    python main.py --serve --port 8080 --concurrency 4
     python main.py --list-characters
 """
 
@@ -78,6 +81,9 @@ Examples:
   python main.py https://x.com/user/status/123456789
   python main.py https://x.com/user/status/123456789 --character nekira
   python main.py https://x.com/user/status/123456789 --dry-run
+  python main.py --batch urls.txt --output results.jsonl --concurrency 4
+  cat urls.jsonl | python main.py --batch - --output results.jsonl
+  python main.py --serve --port 8080 --concurrency 4
   python main.py --list-characters
         """
     )
@@ -106,6 +112,45 @@ Examples:
         help="Skip image generation even if the agent decides to create one"
     )
     
+    parser.add_argument(
+        "--batch", "-b",
+        metavar="FILE",
+        help="Process tweet URLs from FILE ('-' for stdin), one per line or as JSONL records with 'tweet_url'"
+    )
+    
+    parser.add_argument(
+        "--output", "-o",
+        metavar="FILE",
+        help="Append batch results as JSONL to FILE (default: stdout)"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Number of tweets processed concurrently in batch or service mode "
+             "(default: BATCH_CONCURRENCY or SERVICE_WORKERS, 4)"
+    )
+    
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a resident service accepting jobs over a local HTTP API"
+    )
+    
+    parser.add_argument(
+        "--host",
+        default=os.getenv("SERVICE_HOST", "127.0.0.1"),
+        help="Service bind address (default: 127.0.0.1)"
+    )
+    
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.getenv("SERVICE_PORT", "8080")),
+        help="Service port (default: 8080)"
+    )
+    
     parser.add_argument(
         "--list-characters", "-l",
         action="store_true",
@@ -126,22 +171,39 @@ Examples:
         list_characters()
         return 0
     
-    # Require tweet_url for main operation
-    if not args.tweet_url:
-        parser.error("tweet_url is required unless using --list-characters")
+    # Require exactly one of tweet_url, --batch or --serve for main operation
+    modes = [mode for mode in (args.tweet_url, args.batch, args.serve) if mode]
+    if not modes:
+        parser.error("tweet_url is required unless using --batch, --serve or --list-characters")
+    if len(modes) > 1:
+        parser.error("pass only one of tweet_url, --batch or --serve")
+    
+    if args.concurrency is None:
+        args.concurrency = int(os.getenv("SERVICE_WORKERS" if args.serve else "BATCH_CONCURRENCY", "4"))
     
     # Set verbose logging
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
-    # Print banner and info
-    print_banner()
+    # Print banner and info (to stderr when batch results go to stdout)
+    info_stream = sys.stderr if args.batch and not args.output else sys.stdout
+    
+    def banner_print(*lines):
+        print(*lines, file=info_stream)
+    
+    if info_stream is sys.stdout:
+        print_banner()
     
-    print(f"🤖 Character: {args.character}")
-    print(f"🔗 Tweet: {args.tweet_url}")
-    print(f"{'🧪 DRY RUN MODE - Will NOT post to Twitter' if args.dry_run else '✅ LIVE MODE - Will post to Twitter'}")
-    print(f"{'🖼️  Image generation: DISABLED' if args.no_image else '🖼️  Image generation: AUTO'}")
-    print("-" * 60)
+    banner_print(f"🤖 Character: {args.character}")
+    if args.serve:
+        banner_print(f"🛰️  Service: http://{args.host}:{args.port} ({args.concurrency} workers)")
+    elif args.batch:
+        banner_print(f"📄 Batch: {'stdin' if args.batch == '-' else args.batch} (concurrency {args.concurrency})")
+    else:
+        banner_print(f"🔗 Tweet: {args.tweet_url}")
+    banner_print(f"{'🧪 DRY RUN MODE - Will NOT post to Twitter' if args.dry_run else '✅ LIVE MODE - Will post to Twitter'}")
+    banner_print(f"{'🖼️  Image generation: DISABLED' if args.no_image else '🖼️  Image generation: AUTO'}")
+    banner_print("-" * 60)
     
     # Set environment variables for the agent
     os.environ["ACTIVE_CHARACTER"] = args.character
@@ -154,38 +216,27 @@ Examples:
     
     try:
         # Import agent after setting environment
-        from twitter_post_analyzer.agent import root_agent
-        from google.adk.runners import Runner
-        from google.adk.sessions import InMemorySessionService
+        from twitter_post_analyzer.pipeline_runner import run_single, run_batch_file
         
-        print("\n🚀 Starting agent pipeline...")
+        if args.serve:
+            from twitter_post_analyzer.service import serve
+            banner_print("\n🚀 Starting agent service...")
+            serve(host=args.host, port=args.port, workers=args.concurrency)
+            return 0
         
-        # Create session service and runner
-        session_service = InMemorySessionService()
-        runner = Runner(
-            agent=root_agent,
-            session_service=session_service,
-            app_name="nekira-agent"
-        )
+        banner_print("\n🚀 Starting agent pipeline...")
         
-        # Run the agent
-        async def run_agent():
-            session = await session_service.create_session(
-                app_name="nekira-agent",
-                user_id="user"
-            )
-            
-            async for event in runner.run_async(
-                session_id=session.id,
-                user_id="user",
-                new_message=args.tweet_url
-            ):
-                if hasattr(event, 'content'):
-                    logger.info(f"Agent output: {event.content}")
-            
-            return session
+        if args.batch:
+            counts = asyncio.run(run_batch_file(args.batch, args.output, args.concurrency))
+            banner_print("\n" + "=" * 60)
+            banner_print(f"✅ Batch completed: {counts['success']} succeeded, {counts['error']} failed")
+            return 0 if counts["error"] == 0 else 1
         
-        result = asyncio.run(run_agent())
+        result = asyncio.run(run_single(args.tweet_url))
+        logger.info(f"Agent output: {result.get('final_response')}")
+        if result["status"] != "success":
+            logger.error(f"Agent pipeline failed: {result.get('message')}")
+            return 1
         
         print("\n" + "=" * 60)
         print("✅ Agent pipeline completed!")
@@ -4,32 +4,83 @@ Main Agent Orchestrator
 ========================
 Sequential pipeline that coordinates all sub-agents to process
 tweets and generate responses.
+
+PIPELINE_MODE selects how the tool-only stages run:
+- "deterministic" (default): data preparation, image generation and posting
+  are plain code steps that read and write session.state directly; only the
+  character and prompt-formatter stages call the LLM.
+- "llm": every stage is an LlmAgent that routes data through tool calls.
+
+CHARACTER_SINGLE_CALL=true replaces the character + prompt-formatter pair
+with one structured character call that also describes the image scene,
+followed by code-side prompt assembly from the character's visual config.
+
+SPECULATIVE_IMAGE_GENERATION=true (deterministic mode with
+CHARACTER_SINGLE_CALL) starts Replicate as soon as the character output
+asks for an image, so generation overlaps prompt assembly and reply
+validation; it is cancelled if the reply ends up without an image. In
+two-call mode the formatter LLM writes the image prompt, so nothing can
+be started before it and the setting is ignored.
 """
 
+import os
+import logging
+
 from google.adk.agents import SequentialAgent
 
 # Import sub-agents
-from .sub_agents.tweet_data_preparation_agent.agent import tweet_data_preparation_agent
-from .sub_agents.character_agent.agent import character_agent
-from .sub_agents.image_generator_agent.agent import image_generator_agent
-from .sub_agents.post_reply_agent.agent import post_reply_agent
-from .sub_agents.prompt_formatter_agent.agent import prompt_formatter_agent
+from .sub_agents.tweet_data_preparation_agent.agent import tweet_data_preparation_agent, tweet_data_preparation_step
+from .sub_agents.character_agent.agent import character_agent, character_single_call_agent
+from .sub_agents.image_generator_agent.agent import (
+    image_generator_agent,
+    image_generation_step,
+    speculative_image_start
+)
+from .sub_agents.post_reply_agent.agent import post_reply_agent, post_reply_step
+from .sub_agents.prompt_formatter_agent.agent import prompt_formatter_agent, prompt_assembly_step
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "deterministic").lower()
+CHARACTER_SINGLE_CALL = os.getenv("CHARACTER_SINGLE_CALL", "false").lower() == "true"
+SPECULATIVE_IMAGE_GENERATION = os.getenv("SPECULATIVE_IMAGE_GENERATION", "false").lower() == "true"
+
+if CHARACTER_SINGLE_CALL:
+    character_stage, formatting_stage = character_single_call_agent, prompt_assembly_step
+else:
+    character_stage, formatting_stage = character_agent, prompt_formatter_agent
+    if SPECULATIVE_IMAGE_GENERATION:
+        logger.warning("SPECULATIVE_IMAGE_GENERATION needs CHARACTER_SINGLE_CALL=true; ignoring it.")
+response_stages = [character_stage, formatting_stage]
+
+if PIPELINE_MODE == "llm":
+    pipeline_stages = [
+        tweet_data_preparation_agent,
+        *response_stages,
+        image_generator_agent,
+        post_reply_agent
+    ]
+else:
+    if PIPELINE_MODE != "deterministic":
+        logger.warning(f"Unknown PIPELINE_MODE '{PIPELINE_MODE}', using 'deterministic'.")
+    pipeline_stages = [
+        tweet_data_preparation_step,
+        character_stage,
+        *([speculative_image_start] if SPECULATIVE_IMAGE_GENERATION and CHARACTER_SINGLE_CALL else []),
+        formatting_stage,
+        image_generation_step,
+        post_reply_step
+    ]
 
 # Create the main orchestrator using SequentialAgent
 twitter_post_analyzer = SequentialAgent(
     name="twitter_post_analyzer_workflow",
     description="Sequentially processes a tweet: data preparation, character response, image generation (optional), and posting the reply.",
-    sub_agents=[
-        tweet_data_preparation_agent,
-        character_agent,
-        prompt_formatter_agent,
-        image_generator_agent,
-        post_reply_agent
-    ],
+    sub_agents=pipeline_stages,
     # The flow of data and conditional logic is handled within the sub-agents
     # by reading from and writing to session.state.
     # The final output will be the output of the last agent (post_reply_agent).
 )
 
 # Root agent for ADK Runner
-root_agent = twitter_post_analyzer
\ No newline at end of file
+root_agent = twitter_post_analyzer
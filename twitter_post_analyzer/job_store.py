@@ -0,0 +1,202 @@
+# twitter_post_analyzer/job_store.py
+"""
+Job Store
+==========
+Durable record of pipeline jobs in SQLite (WAL mode): each job's status,
+the last completed stage, and the session.state keys written so far.
+After a crash or restart, a job is resumed by seeding a new session with
+its stored state, so completed stages are skipped rather than re-run.
+
+Jobs are scoped by namespace and run profile:
+- namespace separates batch runs from the service, so service recovery
+  never picks up (and posts for) jobs a crashed batch left running.
+- the run profile (live/dry-run, character, image mode) is part of the key,
+  so a dry run or a run with another character never completes or feeds
+  stages into a live run of the same tweet.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT_DIR = Path(__file__).resolve().parent
+JOB_STORE_PATH = Path(os.getenv("JOB_STORE_PATH", PROJECT_ROOT_DIR / "media" / "jobs.sqlite3"))
+JOB_STORE_ENABLED = os.getenv("JOB_STORE_ENABLED", "true").lower() == "true"
+
+
+def current_run_profile() -> str:
+    """The settings that change what a job posts: live or dry run, character and image mode."""
+    mode = "dry_run" if os.getenv("DRY_RUN_MODE", "false").lower() == "true" else "live"
+    character = os.getenv("ACTIVE_CHARACTER", "nekira")
+    images = "no_image" if os.getenv("SKIP_IMAGE_GENERATION", "false").lower() == "true" else "image"
+    return f"{mode}:{character}:{images}"
+
+
+class JobStore:
+    """
+    SQLite table of jobs with their stage progress and accumulated pipeline state.
+    Every method only sees the jobs of this store's namespace and run profile.
+    """
+
+    def __init__(self, db_path: Path = JOB_STORE_PATH, namespace: str = "batch",
+                 profile: Optional[str] = None):
+        self.db_path = Path(db_path)
+        self.namespace = namespace
+        self.profile = profile or current_run_profile()
+        self._scope = (self.namespace, self.profile)
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate_unscoped_table()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " namespace TEXT NOT NULL,"
+            " profile TEXT NOT NULL,"
+            " id TEXT NOT NULL,"
+            " tweet_url TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " stage TEXT,"
+            " state TEXT NOT NULL DEFAULT '{}',"
+            " result TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, profile, id))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_scope_status ON jobs (namespace, profile, status, created_at)")
+        self._conn.commit()
+
+    def _migrate_unscoped_table(self):
+        """Moves a jobs table from before namespaces/profiles aside; its rows can't be attributed to a mode."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)").fetchall()]
+        if columns and "namespace" not in columns:
+            self._conn.execute("DROP INDEX IF EXISTS idx_jobs_status")
+            self._conn.execute("ALTER TABLE jobs RENAME TO jobs_unscoped")
+            self._conn.commit()
+            logger.warning("JOB_STORE: Moved jobs without a run mode to 'jobs_unscoped'; they will not be resumed.")
+
+    def enqueue(self, job_id: str, tweet_url: str):
+        """Records a new job; an existing job with the same id is left untouched."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (namespace, profile, id, tweet_url, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (*self._scope, job_id, tweet_url, now, now)
+            )
+            self._conn.commit()
+
+    def start(self, job_id: str) -> Dict[str, Any]:
+        """Marks a job running, bumps its attempt count and returns its stored state."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?"
+                " WHERE namespace = ? AND profile = ? AND id = ?",
+                (time.time(), *self._scope, job_id)
+            )
+            self._conn.commit()
+            row = self._conn.execute(
+                "SELECT state FROM jobs WHERE namespace = ? AND profile = ? AND id = ?", (*self._scope, job_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def record_stage(self, job_id: str, stage: str, state_delta: Dict[str, Any]):
+        """Merges a completed stage's state keys into the job, committed before the next stage runs."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM jobs WHERE namespace = ? AND profile = ? AND id = ?", (*self._scope, job_id)
+            ).fetchone()
+            state = json.loads(row[0]) if row else {}
+            state.update(state_delta)
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, state = ?, updated_at = ? WHERE namespace = ? AND profile = ? AND id = ?",
+                (stage, json.dumps(state, ensure_ascii=False, default=str), time.time(), *self._scope, job_id)
+            )
+            self._conn.commit()
+
+    def finish(self, job_id: str, status: str, result: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE namespace = ? AND profile = ? AND id = ?",
+                (status, json.dumps(result, ensure_ascii=False, default=str), time.time(), *self._scope, job_id)
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, tweet_url, status, stage, state, result, attempts, created_at, updated_at"
+                " FROM jobs WHERE namespace = ? AND profile = ? AND id = ?", (*self._scope, job_id)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "tweet_url": row[1],
+            "status": row[2],
+            "stage": row[3],
+            "state": json.loads(row[4]),
+            "result": json.loads(row[5]) if row[5] else None,
+            "attempts": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+            "namespace": self.namespace,
+            "profile": self.profile,
+        }
+
+    def list_interrupted(self) -> List[Dict[str, str]]:
+        """Jobs of this namespace and profile left queued or running when the process last stopped, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, tweet_url FROM jobs WHERE namespace = ? AND profile = ? AND status IN ('queued', 'running')"
+                " ORDER BY created_at ASC", self._scope
+            ).fetchall()
+        return [{"id": job_id, "tweet_url": tweet_url} for job_id, tweet_url in rows]
+
+    async def aenqueue(self, job_id: str, tweet_url: str):
+        await asyncio.to_thread(self.enqueue, job_id, tweet_url)
+
+    async def astart(self, job_id: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.start, job_id)
+
+    async def arecord_stage(self, job_id: str, stage: str, state_delta: Dict[str, Any]):
+        await asyncio.to_thread(self.record_stage, job_id, stage, state_delta)
+
+    async def afinish(self, job_id: str, status: str, result: Dict[str, Any]):
+        await asyncio.to_thread(self.finish, job_id, status, result)
+
+    async def aget(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, job_id)
+
+
+_job_stores: Dict[str, JobStore] = {}
+
+
+def get_job_store(namespace: str) -> Optional[JobStore]:
+    """
+    Returns the shared job store for a namespace ("batch" or "service") under the
+    current run profile, or None if it is disabled or cannot be opened.
+    """
+    if not JOB_STORE_ENABLED:
+        return None
+    store = _job_stores.get(namespace)
+    if store is None:
+        try:
+            store = JobStore(namespace=namespace)
+            _job_stores[namespace] = store
+            logger.info(f"JOB_STORE: Opened job store at {JOB_STORE_PATH} ({namespace}, {store.profile})")
+        except sqlite3.Error as e:
+            logger.error(f"JOB_STORE: Failed to open job store at {JOB_STORE_PATH}: {e}")
+            return None
+    return store
@@ -0,0 +1,250 @@
+# twitter_post_analyzer/pipeline_runner.py
+"""
+Pipeline Runner
+================
+Runs the agent pipeline for many tweets on one long-lived ADK Runner, so
+imports, model clients and pooled HTTP connections are set up once and
+shared by concurrent sessions.
+
+With a job store, each job's completed stages are persisted as they
+finish, and a job that is run again resumes after its last completed
+stage (see shared_lib.callbacks.skip_completed_stage). Jobs are keyed by
+id within the run profile (live/dry-run, character, image mode), so a
+dry run never completes the live job for the same tweet.
+
+Used by main.py for single-URL and batch runs, and by the service.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, AsyncIterator, TextIO
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from .agent import root_agent
+from .job_store import JobStore, get_job_store
+from .shared_lib.http_clients import close_http_clients
+from .shared_lib.speculation import cancel_speculative_tasks
+from .shared_lib.utils import parse_json_output, is_replayable_output
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "nekira-agent"
+USER_ID = "user"
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# Session state written by the pipeline's agents, copied into each result
+RESULT_STATE_KEYS = (
+    "tweet_prep_results",
+    "character_agent_output_json",
+    "image_generation_params",
+    "image_generation_results",
+    "post_reply_results",
+)
+
+# post_reply_results statuses that mean the job is done
+POST_REPLY_DONE_STATUSES = ("success", "dry_run")
+
+
+def parse_batch_line(line: str, line_number: int) -> Optional[Dict[str, Any]]:
+    """
+    Parses one batch input line: a JSON object with "tweet_url" (or "url")
+    and an optional "id", or a plain tweet URL. The job id defaults to the
+    URL, so re-running the same input resumes or skips finished jobs.
+    Blank lines and lines starting with '#' are skipped.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        record = json.loads(line)
+        tweet_url = record.get("tweet_url") or record.get("url")
+        if not tweet_url:
+            raise ValueError(f"line {line_number}: JSON record has no 'tweet_url'")
+        return {"id": str(record.get("id") or tweet_url), "tweet_url": tweet_url}
+    return {"id": line, "tweet_url": line}
+
+
+async def iter_batch_input(stream: TextIO) -> AsyncIterator[Dict[str, Any]]:
+    """Yields jobs from a file or stdin as lines arrive, without reading the whole input first."""
+    line_number = 0
+    while True:
+        line = await asyncio.to_thread(stream.readline)
+        if not line:
+            return
+        line_number += 1
+        try:
+            job = parse_batch_line(line, line_number)
+        except (ValueError, json.JSONDecodeError) as e:
+            logger.error(f"PIPELINE_RUNNER: Skipping malformed input on line {line_number}: {e}")
+            continue
+        if job:
+            yield job
+
+
+class PipelineRunner:
+    """One Runner and session service shared by every tweet processed in this process."""
+
+    def __init__(self, agent=root_agent, job_store: Optional[JobStore] = None):
+        self.session_service = InMemorySessionService()
+        self.runner = Runner(agent=agent, session_service=self.session_service, app_name=APP_NAME)
+        self.job_store = job_store
+
+    async def run_one(self, tweet_url: str, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Runs the pipeline for a single tweet in its own session and returns a result record.
+        With a job store and a job_id, finished jobs return their stored result and
+        interrupted ones resume from their last completed stage.
+        """
+        started = time.monotonic()
+        store = self.job_store if job_id else None
+        initial_state: Dict[str, Any] = {}
+
+        if store:
+            stored_job = await store.aget(job_id)
+            if stored_job and stored_job["status"] == "success":
+                logger.info(f"PIPELINE_RUNNER: [{job_id}] already completed; returning stored result.")
+                return {**stored_job["result"], "already_completed": True}
+            await store.aenqueue(job_id, tweet_url)
+            initial_state = await store.astart(job_id)
+            if initial_state:
+                logger.info(f"PIPELINE_RUNNER: [{job_id}] resuming with completed stages: {list(initial_state)}")
+
+        session = await self.session_service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, state=initial_state or None
+        )
+        message = types.Content(role="user", parts=[types.Part(text=tweet_url)])
+        result: Dict[str, Any] = {"id": job_id, "tweet_url": tweet_url, "session_id": session.id}
+        final_response = None
+
+        try:
+            async for event in self.runner.run_async(
+                session_id=session.id,
+                user_id=USER_ID,
+                new_message=message
+            ):
+                if event.content and event.content.parts:
+                    logger.debug(f"PIPELINE_RUNNER: [{job_id}] {event.author}: {event.content}")
+                    if event.is_final_response():
+                        final_response = "".join(part.text or "" for part in event.content.parts)
+                if store and event.actions and event.actions.state_delta:
+                    # Failed and dry-run stages are not persisted, so a resumed job runs them again
+                    stage_output = {
+                        k: v for k, v in event.actions.state_delta.items()
+                        if k in RESULT_STATE_KEYS and is_replayable_output(v)
+                    }
+                    if stage_output:
+                        await store.arecord_stage(job_id, event.author, stage_output)
+
+            finished = await self.session_service.get_session(
+                app_name=APP_NAME, user_id=USER_ID, session_id=session.id
+            )
+            result["final_response"] = final_response
+            result["state"] = {key: finished.state.get(key) for key in RESULT_STATE_KEYS if key in finished.state}
+            # ADK finishing without an exception doesn't mean the reply went out
+            post_results = parse_json_output(finished.state.get("post_reply_results")) or {}
+            if post_results.get("status") in POST_REPLY_DONE_STATUSES:
+                result["status"] = "success"
+            else:
+                result["status"] = "error"
+                result["message"] = post_results.get("message") or "Pipeline finished without posting a reply."
+        except Exception as e:
+            logger.exception(f"PIPELINE_RUNNER: Pipeline failed for {tweet_url}: {e}")
+            result["status"] = "error"
+            result["message"] = str(e)
+        finally:
+            cancel_speculative_tasks(session.id)
+            # Sessions are not needed once the result is recorded; keep memory flat on long runs
+            await self.session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+
+        result["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        if initial_state:
+            result["resumed_stages"] = list(initial_state)
+        if store:
+            await store.afinish(job_id, result["status"], result)
+        return result
+
+    async def run_batch(
+        self,
+        jobs: AsyncIterator[Dict[str, Any]],
+        output: TextIO,
+        concurrency: int = BATCH_CONCURRENCY
+    ) -> Dict[str, int]:
+        """
+        Processes jobs with up to `concurrency` sessions in flight and writes
+        one JSON line per result to `output` as each finishes.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        counts = {"success": 0, "error": 0}
+
+        async def worker():
+            while True:
+                job = await queue.get()
+                try:
+                    if job is None:
+                        return
+                    started = time.monotonic()
+                    try:
+                        result = await self.run_one(job["tweet_url"], job["id"])
+                    except Exception as e:
+                        # e.g. a job store error or a malformed job; the worker must keep draining the queue
+                        logger.exception(f"PIPELINE_RUNNER: [{job.get('id')}] job failed outside the pipeline: {e}")
+                        result = {
+                            "id": job.get("id"),
+                            "tweet_url": job.get("tweet_url"),
+                            "status": "error",
+                            "message": str(e),
+                            "elapsed_seconds": round(time.monotonic() - started, 3),
+                        }
+                    counts[result["status"]] += 1
+                    try:
+                        output.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                        output.flush()
+                    except (OSError, ValueError) as e:
+                        logger.error(f"PIPELINE_RUNNER: [{result['id']}] could not write result: {e}")
+                    logger.info(
+                        f"PIPELINE_RUNNER: [{result['id']}] {result['status']} in {result['elapsed_seconds']}s "
+                        f"({counts['success']} ok, {counts['error']} failed)"
+                    )
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+        try:
+            async for job in jobs:
+                await queue.put(job)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        return counts
+
+
+async def run_single(tweet_url: str) -> Dict[str, Any]:
+    """Runs the pipeline once and closes the shared HTTP clients afterwards."""
+    try:
+        return await PipelineRunner().run_one(tweet_url)
+    finally:
+        await close_http_clients()
+
+
+async def run_batch_file(input_path: str, output_path: Optional[str], concurrency: int) -> Dict[str, int]:
+    """Runs a batch from a file (or '-' for stdin), writing JSONL results to a file (or stdout)."""
+    input_stream = sys.stdin if input_path == "-" else open(input_path, "r", encoding="utf-8")
+    output_stream = sys.stdout if not output_path or output_path == "-" else open(output_path, "a", encoding="utf-8")
+    try:
+        runner = PipelineRunner(job_store=get_job_store("batch"))
+        return await runner.run_batch(iter_batch_input(input_stream), output_stream, concurrency)
+    finally:
+        await close_http_clients()
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
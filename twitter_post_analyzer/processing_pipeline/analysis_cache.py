@@ -0,0 +1,180 @@
+"""
+Analysis Cache
+===============
+Persistent, content-addressed cache for media analysis results.
+Entries are keyed by a hash of the analyzed file plus the model and
+prompt version, stored in SQLite with TTL expiry and LRU eviction.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
+
+PROJECT_ROOT_DIR = Path(__file__).resolve().parent.parent
+ANALYSIS_CACHE_PATH = Path(os.getenv("ANALYSIS_CACHE_PATH", PROJECT_ROOT_DIR / "media" / "analysis_cache.sqlite3"))
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "50000"))
+
+# Eviction scans the table, so it only runs every N writes
+_EVICTION_INTERVAL_WRITES = 100
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(local_path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(local_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(kind: str, content_hash: str, model_name: str, prompt_version: str) -> str:
+    """Build a cache key from the content digest and everything that shapes the result."""
+    return f"{kind}:{model_name}:{prompt_version}:{content_hash}"
+
+
+class AnalysisCache:
+    """SQLite-backed key/value store with TTL expiry and size-bounded LRU eviction."""
+
+    def __init__(self, db_path: Path = ANALYSIS_CACHE_PATH,
+                 ttl_seconds: int = ANALYSIS_CACHE_TTL_SECONDS,
+                 max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_accessed ON analysis_cache (last_accessed)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE analysis_cache SET last_accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= _EVICTION_INTERVAL_WRITES:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        self._writes_since_eviction = 0
+        self._conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key IN "
+                "(SELECT key FROM analysis_cache ORDER BY last_accessed ASC LIMIT ?)",
+                (overflow,)
+            )
+            logging.info(f"Analysis cache evicted {overflow} least recently used entries.")
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Dict[str, Any]):
+        await asyncio.to_thread(self.set, key, value)
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> Optional[AnalysisCache]:
+    """Returns the shared analysis cache, or None if caching is disabled or unavailable."""
+    global _analysis_cache
+    if not ANALYSIS_CACHE_ENABLED:
+        return None
+    if _analysis_cache is None:
+        try:
+            _analysis_cache = AnalysisCache()
+            logging.info(f"Analysis cache opened at {ANALYSIS_CACHE_PATH}")
+        except sqlite3.Error as e:
+            logging.error(f"Failed to open analysis cache at {ANALYSIS_CACHE_PATH}: {e}")
+            return None
+    return _analysis_cache
+
+
+async def get_cached_analysis(
+    kind: str,
+    local_path: str,
+    model_name: str,
+    prompt_version: str,
+    content_hash: Optional[str] = None
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Looks up a cached analysis for a local media file.
+    Pass content_hash when the digest is already known (e.g. computed during download).
+    Returns (cache_key, cached_result). cache_key is None when caching is unavailable.
+    """
+    cache = get_analysis_cache()
+    if not cache:
+        return None, None
+    try:
+        if not content_hash:
+            content_hash = await asyncio.to_thread(hash_file, local_path)
+        cache_key = make_cache_key(kind, content_hash, model_name, prompt_version)
+        cached_result = await cache.aget(cache_key)
+        if cached_result:
+            logging.info(f"Analysis cache hit ({kind}) for {local_path}")
+        return cache_key, cached_result
+    except Exception as e:
+        logging.warning(f"Analysis cache lookup failed for {local_path}: {e}")
+        return None, None
+
+
+async def store_cached_analysis(cache_key: Optional[str], result: Dict[str, Any]):
+    """Stores a successful analysis result under a key from get_cached_analysis()."""
+    cache = get_analysis_cache()
+    if not cache or not cache_key or result.get("error"):
+        return
+    try:
+        await cache.aset(cache_key, result)
+    except Exception as e:
+        logging.warning(f"Failed to store analysis in cache: {e}")
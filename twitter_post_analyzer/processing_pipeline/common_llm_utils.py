@@ -5,6 +5,9 @@ import logging
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
 
+VISION_MODEL_NAME = "gemini-2.5-flash-preview-05-20"
+TEXT_MODEL_NAME = "gemini-pro"
+
 _vision_model = None
 _text_model = None
 
@@ -34,7 +37,7 @@ def get_vision_model() -> GenerativeModel:
         if initialize_vertex_ai():
             try:
                 # Changed model name here
-                _vision_model = GenerativeModel("gemini-2.5-flash-preview-05-20") 
+                _vision_model = GenerativeModel(VISION_MODEL_NAME)
                 logging.info("Gemini Vision Pro model initialized.")
             except Exception as e:
                 logging.error(f"Failed to initialize Gemini Vision Pro model: {e}")
@@ -46,7 +49,7 @@ def get_text_model() -> GenerativeModel:
     if _text_model is None:
         if initialize_vertex_ai():
             try:
-                _text_model = GenerativeModel("gemini-pro")
+                _text_model = GenerativeModel(TEXT_MODEL_NAME)
                 logging.info("Gemini Pro text model initialized.")
             except Exception as e:
                 logging.error(f"Failed to initialize Gemini Pro text model: {e}")
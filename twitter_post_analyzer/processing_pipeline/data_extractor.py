@@ -10,19 +10,47 @@ import os
 import json
 import aiohttp
 import asyncio
+import hashlib
 import logging
+import weakref
 from urllib.parse import urlparse
 import aiofiles
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Set
 from pathlib import Path
 
+from ..shared_lib.http_clients import get_aiohttp_session
+from ..shared_lib.rate_limiter import get_rate_limiter
+from .url_resolver import entity_url_map, resolve_urls
+from .video_analyzer import (
+    MAX_INLINE_VIDEO_SIZE_MB,
+    MAX_KEYFRAME_VIDEO_SIZE_MB,
+    MAX_KEYFRAME_VIDEO_DURATION_SECONDS,
+    VIDEO_ANALYSIS_MODE,
+    keyframe_mode_enabled,
+)
+
 # Configuration
 API_KEY = os.getenv("TWITTERAPI_KEY")
 MAX_VIDEO_DURATION_SECONDS = 120
+MAX_IMAGE_DOWNLOAD_SIZE_MB = float(os.getenv("MAX_IMAGE_DOWNLOAD_SIZE_MB", "20"))
+MEDIA_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Pick the lowest mp4 bitrate that is still adequate instead of the best one that fits
+PREFER_LOWEST_ADEQUATE_VIDEO_BITRATE = os.getenv("PREFER_LOWEST_ADEQUATE_VIDEO_BITRATE", "false").lower() == "true"
+MIN_ADEQUATE_VIDEO_BITRATE = int(os.getenv("MIN_ADEQUATE_VIDEO_BITRATE", "800000"))
+# Bitrate * duration underestimates the file (container overhead, audio track)
+VIDEO_SIZE_ESTIMATE_MARGIN = 1.15
+# Upper bound on tweet fetches (and their media downloads) in flight per thread
+MAX_CONCURRENT_TWEET_FETCHES = int(os.getenv("MAX_CONCURRENT_TWEET_FETCHES", "4"))
+# Tweet lookups issued within the window are sent as one multi-ID request
+TWEET_LOOKUP_BATCH_SIZE = int(os.getenv("TWEET_LOOKUP_BATCH_SIZE", "20"))
+TWEET_LOOKUP_BATCH_WINDOW_SECONDS = float(os.getenv("TWEET_LOOKUP_BATCH_WINDOW_SECONDS", "0.05"))
 
 if not API_KEY:
     logging.error("TWITTERAPI_KEY is missing")
 
+# Links to these hosts point back at X itself and are not analyzed as external links
+TWITTER_HOSTS = {"x.com", "twitter.com", "www.x.com", "www.twitter.com", "mobile.twitter.com", "mobile.x.com", "t.co"}
+
 # Define project root and media cache directory
 PROJECT_ROOT_DIR = Path(__file__).resolve().parent.parent
 MEDIA_CACHE_BASE_DIR = PROJECT_ROOT_DIR / "media" / "analysis_media_cache"
@@ -45,10 +73,149 @@ def get_tweet_id_from_url(url: str) -> str | None:
     return None
 
 
+# URL extraction works token by token (split on whitespace) with simple patterns,
+# so its cost stays linear in the text length whatever the input looks like.
+_URL_START_RE = re.compile(r"(?i)(?:https?://|www\d{0,3}\.)")
+# Scheme-less links like "example.com/path", matched only at the start of a token
+_BARE_DOMAIN_RE = re.compile(r"(?i)[a-z0-9][a-z0-9\-]{0,62}(?:\.[a-z0-9\-]{1,63}){0,8}\.[a-z]{2,24}/")
+_LEADING_PUNCTUATION = "([{<\"'«“‘"
+_TRAILING_PUNCTUATION = ".,;:!?`'\"»”’…"
+_CLOSING_BRACKETS = {")": "(", "]": "[", "}": "{", ">": "<"}
+
+
+def _trim_url(candidate: str) -> str:
+    """Drops trailing punctuation and closing brackets that have no opening partner in the URL."""
+    unmatched = {
+        closing: candidate.count(closing) - candidate.count(opening)
+        for closing, opening in _CLOSING_BRACKETS.items()
+    }
+    end = len(candidate)
+    while end:
+        char = candidate[end - 1]
+        if char in _TRAILING_PUNCTUATION:
+            end -= 1
+        elif unmatched.get(char, 0) > 0:
+            unmatched[char] -= 1
+            end -= 1
+        else:
+            break
+    return candidate[:end]
+
+
 def extract_urls(text: str) -> List[str]:
-    """Extract URLs from text content."""
-    url_regex = r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»""'']))"
-    return [match[0] for match in re.findall(url_regex, text)]
+    """Extract URLs from text content, in order of appearance."""
+    urls = []
+    for token in text.split():
+        # Every URL form matched below contains a dot; skips most words cheaply
+        if "." not in token:
+            continue
+        match = _URL_START_RE.search(token)
+        if match:
+            start = match.start()
+        else:
+            start = len(token) - len(token.lstrip(_LEADING_PUNCTUATION))
+            if not _BARE_DOMAIN_RE.match(token, start):
+                continue
+        url = _trim_url(token[start:])
+        if url and not _URL_START_RE.fullmatch(url):
+            urls.append(url)
+    return urls
+
+
+def extract_tweet_urls(tweet: Dict[str, Any]) -> List[str]:
+    """
+    URLs linked from a tweet. Uses the structured entities.urls (expanded URL
+    when available) and falls back to scanning the text.
+    """
+    entity_urls = [
+        entity.get("expanded_url") or entity.get("url")
+        for entity in (tweet.get("entities") or {}).get("urls") or []
+    ]
+    entity_urls = [url for url in entity_urls if url]
+    return entity_urls or extract_urls(tweet.get("text", ""))
+
+
+def estimate_video_variant_size(variant: Dict, duration_millis: int) -> int:
+    """Estimate the file size in bytes of a video variant from its bitrate and duration."""
+    return int(variant.get("bitrate", 0) * (duration_millis / 1000) / 8 * VIDEO_SIZE_ESTIMATE_MARGIN)
+
+
+def select_video_variant(
+    video_info: Dict,
+    max_bytes: int,
+    prefer_lowest_adequate: bool = PREFER_LOWEST_ADEQUATE_VIDEO_BITRATE
+) -> Dict | None:
+    """
+    Choose the mp4 variant to download.
+    By default returns the highest-bitrate variant whose estimated size fits
+    under max_bytes; with prefer_lowest_adequate, the lowest one that still
+    meets MIN_ADEQUATE_VIDEO_BITRATE. Returns None if no variant fits.
+    """
+    mp4_variants = sorted(
+        [v for v in video_info.get("variants", []) if v.get("content_type") == "video/mp4"],
+        key=lambda x: x.get("bitrate", 0),
+        reverse=True
+    )
+    if not mp4_variants:
+        return None
+
+    duration_millis = video_info.get("duration_millis", 0)
+    if duration_millis:
+        fitting = [v for v in mp4_variants if estimate_video_variant_size(v, duration_millis) <= max_bytes]
+    else:
+        # Size can't be estimated; the streaming size cap still applies
+        fitting = mp4_variants
+    if not fitting:
+        return None
+
+    if prefer_lowest_adequate:
+        adequate = [v for v in fitting if v.get("bitrate", 0) >= MIN_ADEQUATE_VIDEO_BITRATE]
+        return adequate[-1] if adequate else fitting[0]
+    return fitting[0]
+
+
+async def stream_media_to_file(
+    session: aiohttp.ClientSession,
+    media_url: str,
+    file_path: Path,
+    max_bytes: int
+) -> str | None:
+    """
+    Stream a media file to disk chunk by chunk, hashing it on the way.
+    Aborts (and removes the partial file) once it exceeds max_bytes.
+    Returns the SHA-256 hex digest, or None if the file was too large.
+    On a network error, timeout or cancellation the partial file is removed
+    before the exception propagates, so no truncated file is left behind.
+    """
+    async with session.get(media_url) as response:
+        response.raise_for_status()
+
+        if response.content_length and response.content_length > max_bytes:
+            logging.info(
+                f"Skipping media {media_url}: Content-Length {response.content_length} exceeds limit {max_bytes} bytes"
+            )
+            return None
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(MEDIA_DOWNLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        break
+                    digest.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            file_path.unlink(missing_ok=True)
+            raise
+
+    if size > max_bytes:
+        logging.info(f"Aborted download of {media_url}: exceeded limit {max_bytes} bytes")
+        file_path.unlink(missing_ok=True)
+        return None
+
+    return digest.hexdigest()
 
 
 async def download_media_internal(
@@ -66,30 +233,45 @@ async def download_media_internal(
     for index, media in enumerate(media_list):
         media_url = None
         file_ext = ".jpg"
+        max_bytes = int(MAX_IMAGE_DOWNLOAD_SIZE_MB * 1024 * 1024)
         
         # Handle video media
         if media.get("type") == "video" and "video_info" in media:
             duration_millis = media["video_info"].get("duration_millis", 0)
             duration_seconds = duration_millis / 1000
             
-            if duration_seconds > MAX_VIDEO_DURATION_SECONDS:
+            # Keyframe analysis lifts the inline duration and size limits
+            keyframes_available = keyframe_mode_enabled()
+            max_duration_seconds = (
+                MAX_KEYFRAME_VIDEO_DURATION_SECONDS if keyframes_available else MAX_VIDEO_DURATION_SECONDS
+            )
+            if duration_seconds > max_duration_seconds:
                 logging.info(
-                    f"Skipping video in tweet {tweet_id}: duration {duration_seconds:.2f}s exceeds limit {MAX_VIDEO_DURATION_SECONDS}s"
+                    f"Skipping video in tweet {tweet_id}: duration {duration_seconds:.2f}s exceeds limit {max_duration_seconds}s"
                 )
                 continue
             
-            variants = media["video_info"].get("variants", [])
-            mp4_variants = sorted(
-                [v for v in variants if v.get("content_type") == "video/mp4"],
-                key=lambda x: x.get("bitrate", 0),
-                reverse=True
-            )
+            variant = None
+            prefer_inline = VIDEO_ANALYSIS_MODE != "keyframes" or not keyframes_available
+            if prefer_inline and duration_seconds <= MAX_VIDEO_DURATION_SECONDS:
+                max_bytes = int(MAX_INLINE_VIDEO_SIZE_MB * 1024 * 1024)
+                variant = select_video_variant(media["video_info"], max_bytes)
+            if not variant and keyframes_available:
+                # Sampled frames are downsized anyway, so the lowest adequate bitrate is enough
+                max_bytes = int(MAX_KEYFRAME_VIDEO_SIZE_MB * 1024 * 1024)
+                variant = select_video_variant(media["video_info"], max_bytes, prefer_lowest_adequate=True)
             
-            if mp4_variants:
-                media_url = mp4_variants[0]["url"]
+            if variant:
+                media_url = variant["url"]
                 file_ext = ".mp4"
+                logging.info(
+                    f"Selected {variant.get('bitrate', 0)} bps variant for video in tweet {tweet_id} "
+                    f"(estimated {estimate_video_variant_size(variant, duration_millis) / (1024 * 1024):.2f}MB)"
+                )
             else:
-                logging.warning(f"No mp4 variant found for video in tweet {tweet_id}")
+                logging.warning(
+                    f"No mp4 variant of video in tweet {tweet_id} fits under {max_bytes / (1024 * 1024):.0f}MB"
+                )
                 continue
         else:
             # Handle image media
@@ -105,17 +287,17 @@ async def download_media_internal(
         file_path = media_cache_dir / file_name
 
         try:
-            async with session.get(media_url) as response:
-                response.raise_for_status()
-                async with aiofiles.open(file_path, "wb") as f:
-                    await f.write(await response.read())
-                
-                saved_files.append({
-                    "url": media_url,
-                    "local_path": str(file_path),
-                    "type": media.get("type", "unknown")
-                })
-                logging.info(f"Downloaded media: {media_url} -> {file_path}")
+            content_sha256 = await stream_media_to_file(session, media_url, file_path, max_bytes)
+            if content_sha256 is None:
+                continue
+
+            saved_files.append({
+                "url": media_url,
+                "local_path": str(file_path),
+                "type": media.get("type", "unknown"),
+                "sha256": content_sha256
+            })
+            logging.info(f"Downloaded media: {media_url} -> {file_path}")
         
         except Exception as e:
             logging.error(f"Error downloading media {media_url}: {e}")
@@ -123,39 +305,137 @@ async def download_media_internal(
     return saved_files
 
 
-async def get_tweet_details_internal(
+async def get_tweets_batch_internal(
     session: aiohttp.ClientSession,
-    tweet_id: str
-) -> Dict | None:
-    """Fetch tweet details from the Twitter API."""
+    tweet_ids: List[str]
+) -> Dict[str, Dict]:
+    """
+    Fetch several tweets in one request. Returns tweets keyed by ID.
+    Paced by the twitterapi.io rate limiter; 429/5xx responses are retried with backoff.
+    """
     url = "https://api.twitterapi.io/twitter/tweets"
     headers = {"X-API-Key": API_KEY}
-    params = {"tweet_ids": tweet_id}
+    params = {"tweet_ids": ",".join(tweet_ids)}
+
+    limiter = get_rate_limiter("twitterapi_io")
+    attempt = 0
+
+    while True:
+        await limiter.acquire()
+        try:
+            async with session.get(url, headers=headers, params=params) as response:
+                status_code = response.status
+                response_text = await response.text()
+                response_headers = response.headers
+        except aiohttp.ClientError as e:
+            delay = limiter.retry_delay(None, {}, attempt)
+            if delay is None:
+                logging.error(f"Request error for tweets {tweet_ids}: {e}")
+                return {}
+            logging.warning(f"Request error for tweets {tweet_ids}: {e}; retrying in {delay:.1f}s")
+        else:
+            delay = limiter.retry_delay(status_code, response_headers, attempt)
+            if delay is None:
+                break
+            logging.warning(f"HTTP {status_code} fetching tweets {tweet_ids}; retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        attempt += 1
+
+    if status_code != 200:
+        logging.error(f"HTTP {status_code} error fetching tweets {tweet_ids}: {response_text}")
+        return {}
 
     try:
-        async with session.get(url, headers=headers, params=params) as response:
-            status_code = response.status
-            response_text = await response.text()
-
-            if status_code != 200:
-                logging.error(f"HTTP {status_code} error fetching tweet {tweet_id}: {response_text}")
-                return None
-
-            data = await response.json()
-            if data.get("status") != "success" or not data.get("tweets"):
-                logging.error(f"Error fetching tweet {tweet_id}: {data.get('message', 'Unknown error')}")
-                return None
-            
-            return data["tweets"][0]
-    
-    except aiohttp.ClientError as e:
-        if "429" in str(e):
-            logging.warning("Rate limit reached (429). Waiting 60 seconds before retry...")
-            await asyncio.sleep(60)
-            return await get_tweet_details_internal(session, tweet_id)
-        
-        logging.error(f"Request error for tweet {tweet_id}: {e}")
-        return None
+        data = json.loads(response_text)
+    except json.JSONDecodeError as e:
+        logging.error(f"Invalid JSON fetching tweets {tweet_ids}: {e}")
+        return {}
+    if data.get("status") != "success" or not data.get("tweets"):
+        logging.error(f"Error fetching tweets {tweet_ids}: {data.get('message', 'Unknown error')}")
+        return {}
+
+    return {str(tweet.get("id")): tweet for tweet in data["tweets"]}
+
+
+class TweetLookupBatcher:
+    """
+    Coalesces concurrent tweet lookups into multi-ID requests.
+
+    Lookups issued within TWEET_LOOKUP_BATCH_WINDOW_SECONDS of each other (from
+    the same thread or from other jobs on the same event loop) are sent as a
+    single `tweet_ids` request, and each result is routed back to its caller.
+    """
+
+    def __init__(self, batch_size: int = TWEET_LOOKUP_BATCH_SIZE,
+                 window_seconds: float = TWEET_LOOKUP_BATCH_WINDOW_SECONDS):
+        self.batch_size = max(1, batch_size)
+        self.window_seconds = window_seconds
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._sessions: List[aiohttp.ClientSession] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        # The event loop only keeps weak references to tasks; hold dispatches until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def lookup(self, session: aiohttp.ClientSession, tweet_id: str) -> Dict | None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(str(tweet_id), []).append(future)
+        self._sessions.append(session)
+
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        sessions, self._sessions = self._sessions, []
+        # Every caller awaits inside its own session context, so any open one will do
+        session = next((s for s in sessions if not s.closed), sessions[0])
+        task = asyncio.get_running_loop().create_task(self._dispatch(session, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, session: aiohttp.ClientSession, batch: Dict[str, List[asyncio.Future]]):
+        tweets: Dict[str, Dict] = {}
+        try:
+            tweets = await get_tweets_batch_internal(session, list(batch))
+        except Exception as e:
+            logging.error(f"Unexpected error in batched tweet lookup {list(batch)}: {e}")
+        finally:
+            for tweet_id, futures in batch.items():
+                for future in futures:
+                    if not future.done():
+                        future.set_result(tweets.get(tweet_id))
+
+
+_lookup_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TweetLookupBatcher]" = weakref.WeakKeyDictionary()
+
+
+def get_tweet_lookup_batcher() -> TweetLookupBatcher:
+    """Return the lookup batcher shared by all jobs on the running event loop."""
+    loop = asyncio.get_running_loop()
+    batcher = _lookup_batchers.get(loop)
+    if batcher is None:
+        batcher = TweetLookupBatcher()
+        _lookup_batchers[loop] = batcher
+    return batcher
+
+
+async def get_tweet_details_internal(
+    session: aiohttp.ClientSession,
+    tweet_id: str
+) -> Dict | None:
+    """Fetch tweet details from the Twitter API (batched with concurrent lookups)."""
+    return await get_tweet_lookup_batcher().lookup(session, tweet_id)
 
 
 async def process_single_tweet(
@@ -188,7 +468,8 @@ async def process_single_tweet(
         session, media_list, tweet_id, media_prefix, analysis_id
     )
 
-    extracted_urls = extract_urls(tweet.get("text", ""))
+    # t.co links are expanded (from the tweet's entities when possible) so the real target is analyzed
+    extracted_urls = await resolve_urls(session, extract_tweet_urls(tweet), entity_url_map(tweet))
 
     # Get quoted post ID if exists
     quoted_post_id = None
@@ -236,57 +517,60 @@ async def fetch_and_prepare_tweet_data(tweet_url: str) -> Dict[str, Any]:
         all_posts_data = []
         all_posts_structured = []
 
-        async with aiohttp.ClientSession() as session:
-            # Fetch main post
-            main_post_data = await process_single_tweet(
-                session, tweet_id,
-                media_prefix="post",
-                analysis_id=analysis_id,
-                parent_post_id=None
-            )
-            
-            if not main_post_data:
-                return {
-                    "status": "error",
-                    "message": "Failed to retrieve main tweet data.",
-                    "analysis_id": analysis_id
-                }
-            
-            all_posts_data.append(main_post_data)
+        session = get_aiohttp_session()
+        fetch_limiter = asyncio.Semaphore(MAX_CONCURRENT_TWEET_FETCHES)
 
-            # Fetch quoted post if exists
-            if main_post_data["quoted_post_id"]:
-                quoted_data = await process_single_tweet(
-                    session, main_post_data["quoted_post_id"],
-                    media_prefix="quoted",
+        async def fetch_post(post_id: str, media_prefix: str, parent_post_id: str | None) -> Dict | None:
+            async with fetch_limiter:
+                return await process_single_tweet(
+                    session, post_id,
+                    media_prefix=media_prefix,
                     analysis_id=analysis_id,
-                    parent_post_id=tweet_id
+                    parent_post_id=parent_post_id
                 )
-                if quoted_data:
-                    all_posts_data.append(quoted_data)
-
-            # Fetch replied-to post if exists
-            if main_post_data["replied_to_post_id"]:
-                replied_to_data = await process_single_tweet(
-                    session, main_post_data["replied_to_post_id"],
-                    media_prefix="replied_to",
-                    analysis_id=analysis_id,
-                    parent_post_id=tweet_id
+
+        async def fetch_replied_to_branch(replied_to_post_id: str) -> List[Dict]:
+            # The quote inside the reply depends on the reply itself,
+            # so this branch stays sequential internally.
+            replied_to_data = await fetch_post(replied_to_post_id, "replied_to", tweet_id)
+            if not replied_to_data:
+                return []
+
+            branch = [replied_to_data]
+            if replied_to_data["quoted_post_id"]:
+                quoted_in_reply_data = await fetch_post(
+                    replied_to_data["quoted_post_id"], "quoted_in_reply", replied_to_data["post_id"]
                 )
-                
-                if replied_to_data:
-                    all_posts_data.append(replied_to_data)
-                    
-                    # Also fetch quoted post in the reply
-                    if replied_to_data["quoted_post_id"]:
-                        quoted_in_reply_data = await process_single_tweet(
-                            session, replied_to_data["quoted_post_id"],
-                            media_prefix="quoted_in_reply",
-                            analysis_id=analysis_id,
-                            parent_post_id=replied_to_data["post_id"]
-                        )
-                        if quoted_in_reply_data:
-                            all_posts_data.append(quoted_in_reply_data)
+                if quoted_in_reply_data:
+                    branch.append(quoted_in_reply_data)
+            return branch
+
+        async def fetch_quoted_branch(quoted_post_id: str) -> List[Dict]:
+            quoted_data = await fetch_post(quoted_post_id, "quoted", tweet_id)
+            return [quoted_data] if quoted_data else []
+
+        # Fetch main post
+        main_post_data = await fetch_post(tweet_id, "post", None)
+        
+        if not main_post_data:
+            return {
+                "status": "error",
+                "message": "Failed to retrieve main tweet data.",
+                "analysis_id": analysis_id
+            }
+        
+        all_posts_data.append(main_post_data)
+
+        # Quoted and replied-to branches only depend on the main post,
+        # so they are fetched concurrently.
+        branches = []
+        if main_post_data["quoted_post_id"]:
+            branches.append(fetch_quoted_branch(main_post_data["quoted_post_id"]))
+        if main_post_data["replied_to_post_id"]:
+            branches.append(fetch_replied_to_branch(main_post_data["replied_to_post_id"]))
+
+        for branch_posts in await asyncio.gather(*branches):
+            all_posts_data.extend(branch_posts)
 
         # Structure the data for analysis
         for post in all_posts_data:
@@ -296,15 +580,14 @@ async def fetch_and_prepare_tweet_data(tweet_url: str) -> Dict[str, Any]:
                     "type": media_item["type"],
                     "local_path": media_item["local_path"],
                     "original_url": media_item["url"],
+                    "content_sha256": media_item.get("sha256"),
                     "tweet_text_context": post["text"]
                 })
 
             links_to_analyze = []
             for url_item in post["extracted_urls"]:
-                parsed_url = urlparse(url_item)
-                # Exclude Twitter/X links
-                if (parsed_url.netloc not in ["x.com", "twitter.com", "www.x.com", "www.twitter.com"]
-                    and "t.co" not in parsed_url.netloc):
+                # Exclude Twitter/X links (and t.co links that could not be expanded)
+                if (urlparse(url_item).hostname or "").lower() not in TWITTER_HOSTS:
                     links_to_analyze.append({
                         "url": url_item,
                         "tweet_text_context": post["text"]
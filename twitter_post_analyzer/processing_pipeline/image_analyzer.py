@@ -1,14 +1,23 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
 import logging
 from vertexai.generative_models import Image # Only Image is needed here
-from .common_llm_utils import get_vision_model # MODIFIED: Relative import
+from .common_llm_utils import get_vision_model, VISION_MODEL_NAME # MODIFIED: Relative import
+from .analysis_cache import get_cached_analysis, store_cached_analysis
+from .perceptual_hash_index import find_near_duplicate_analysis, index_image_analysis
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
 
-async def analyze_image_content(local_path: str, tweet_text_context: str) -> Dict[str, Any]:
+# Bump when the prompt below changes so cached descriptions are not reused.
+# The prompt must not depend on the tweet: descriptions are cached by image content
+# (and reused for near-duplicates), so they are shared by every tweet with that image.
+IMAGE_ANALYSIS_PROMPT_VERSION = "image-v2"
+
+async def analyze_image_content(local_path: str, tweet_text_context: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
     """
     Analyzes image content using Google Gemini Vision Pro.
+    The description is tweet-independent so it can be cached by content; relating
+    it to tweet_text_context is left to the report and character stages.
     """
     vision_model = get_vision_model()
     if not vision_model:
@@ -17,13 +26,30 @@ async def analyze_image_content(local_path: str, tweet_text_context: str) -> Dic
     if not os.path.exists(local_path):
         return {"description": None, "source": "gemini-pro-vision", "error": f"Image file not found: {local_path}"}
 
+    cache_key, cached_result = await get_cached_analysis(
+        "image", local_path, VISION_MODEL_NAME, IMAGE_ANALYSIS_PROMPT_VERSION, content_hash
+    )
+    if cached_result:
+        return cached_result
+
+    # Re-encoded or resized copies miss the byte-level cache but match perceptually.
+    # The namespace carries the prompt version, so only tweet-independent descriptions are reused.
+    phash_namespace = f"{VISION_MODEL_NAME}:{IMAGE_ANALYSIS_PROMPT_VERSION}"
+    dhash, near_duplicate_result = await find_near_duplicate_analysis(local_path, phash_namespace)
+    if near_duplicate_result:
+        await store_cached_analysis(cache_key, near_duplicate_result)
+        return near_duplicate_result
+
     try:
         image = Image.load_from_file(local_path)
-        prompt = f"Analyze this image in the context of the following tweet text: '{tweet_text_context}'. Describe the image content, any objects, scenes, or text present, and its relevance to the tweet. Be concise and informative."
+        prompt = "Describe this image: its content, any objects, people, scenes, and any text present (quote it). Be concise and informative."
         
         responses = await vision_model.generate_content_async([prompt, image])
         description = responses.text.strip()
-        return {"description": description, "source": "gemini-pro-vision", "error": None}
+        result = {"description": description, "source": "gemini-pro-vision", "error": None}
+        await store_cached_analysis(cache_key, result)
+        await index_image_analysis(dhash, phash_namespace, result)
+        return result
     except Exception as e:
         logging.error(f"Error analyzing image {local_path}: {e}")
         return {"description": None, "source": "gemini-pro-vision", "error": str(e)}
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Keyframe Extractor
+===================
+Samples a fixed budget of representative frames from a local video
+using the ffmpeg/ffprobe command-line tools, downsized to JPEG, so
+long or large videos can be analyzed as a compact batch of images.
+
+Scene sampling makes one pass over the whole video to collect the
+timestamps of every scene change, keeps the ones closest to an even time
+grid over the duration, and then seeks to each of them for its frame, so
+the sample covers the whole video rather than its opening scenes.
+"""
+
+import os
+import re
+import json
+import shutil
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
+
+KEYFRAME_BUDGET = int(os.getenv("KEYFRAME_BUDGET", "8"))
+# "scene" picks frames at scene changes, "uniform" spaces them evenly
+KEYFRAME_SAMPLING = os.getenv("KEYFRAME_SAMPLING", "scene").lower()
+KEYFRAME_SCENE_THRESHOLD = float(os.getenv("KEYFRAME_SCENE_THRESHOLD", "0.3"))
+KEYFRAME_MAX_DIMENSION = int(os.getenv("KEYFRAME_MAX_DIMENSION", "512"))
+KEYFRAME_EXTRACTION_TIMEOUT_SECONDS = 120
+
+_SCALE_FILTER = (
+    f"scale=w='min({KEYFRAME_MAX_DIMENSION},iw)':h='min({KEYFRAME_MAX_DIMENSION},ih)'"
+    f":force_original_aspect_ratio=decrease"
+)
+_SHOWINFO_PTS_TIME = re.compile(rb"\bpts_time:\s*(-?[0-9.]+)")
+
+
+def is_keyframe_extraction_available() -> bool:
+    """True if the ffmpeg and ffprobe binaries are on PATH."""
+    return bool(shutil.which(FFMPEG_BINARY) and shutil.which(FFPROBE_BINARY))
+
+
+async def _run_command(*args: str) -> Tuple[bytes, bytes]:
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), KEYFRAME_EXTRACTION_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise RuntimeError(f"{args[0]} timed out after {KEYFRAME_EXTRACTION_TIMEOUT_SECONDS}s")
+    if process.returncode != 0:
+        raise RuntimeError(f"{args[0]} exited with {process.returncode}: {stderr.decode(errors='replace')[-500:]}")
+    return stdout, stderr
+
+
+async def probe_duration_seconds(local_path: str) -> Optional[float]:
+    """Returns the container duration of a video in seconds, or None if unknown."""
+    output, _ = await _run_command(
+        FFPROBE_BINARY, "-v", "error", "-show_entries", "format=duration", "-of", "json", local_path
+    )
+    duration = json.loads(output or b"{}").get("format", {}).get("duration")
+    return float(duration) if duration else None
+
+
+async def _extract_frames(local_path: str, output_dir: Path, video_filter: str, max_frames: int) -> List[Path]:
+    await _run_command(
+        FFMPEG_BINARY, "-v", "error", "-i", local_path,
+        "-vf", f"{video_filter},{_SCALE_FILTER}",
+        "-fps_mode", "vfr", "-frames:v", str(max_frames), "-q:v", "5",
+        str(output_dir / "frame_%04d.jpg")
+    )
+    return sorted(output_dir.glob("frame_*.jpg"))
+
+
+async def detect_scene_changes(local_path: str) -> List[float]:
+    """Timestamps (seconds) of the first frame and of every scene change, over the whole video."""
+    # showinfo logs each selected frame at info level; nothing is encoded
+    _, stderr = await _run_command(
+        FFMPEG_BINARY, "-hide_banner", "-nostats", "-v", "info", "-i", local_path, "-an",
+        "-vf", f"select='eq(n\\,0)+gt(scene\\,{KEYFRAME_SCENE_THRESHOLD})',showinfo",
+        "-fps_mode", "vfr", "-f", "null", "-"
+    )
+    timestamps = {max(0.0, float(match)) for match in _SHOWINFO_PTS_TIME.findall(stderr)}
+    return sorted(timestamps)
+
+
+def _spread_over_duration(timestamps: List[float], budget: int, duration: Optional[float]) -> List[float]:
+    """Keeps the `budget` timestamps closest to an even grid over the duration, in order."""
+    if len(timestamps) <= budget:
+        return timestamps
+    span = duration or timestamps[-1]
+    remaining = list(timestamps)
+    chosen = []
+    for i in range(budget):
+        target = span * i / (budget - 1) if budget > 1 else 0.0
+        nearest = min(remaining, key=lambda timestamp: abs(timestamp - target))
+        remaining.remove(nearest)
+        chosen.append(nearest)
+    return sorted(chosen)
+
+
+async def _extract_frames_at(local_path: str, output_dir: Path, timestamps: List[float]) -> List[Path]:
+    """Seeks to each timestamp and saves that frame; timestamps past the last frame yield nothing."""
+    outputs = [output_dir / f"frame_{index:04d}.jpg" for index in range(len(timestamps))]
+    await asyncio.gather(*(
+        _run_command(
+            FFMPEG_BINARY, "-v", "error", "-ss", f"{timestamp:.3f}", "-i", local_path,
+            "-vf", _SCALE_FILTER, "-frames:v", "1", "-q:v", "5", str(output)
+        )
+        for timestamp, output in zip(timestamps, outputs)
+    ))
+    return [output for output in outputs if output.exists()]
+
+
+async def extract_keyframes(
+    local_path: str,
+    budget: int = KEYFRAME_BUDGET,
+    sampling: str = KEYFRAME_SAMPLING
+) -> List[bytes]:
+    """
+    Extracts up to `budget` downsized JPEG frames from a video, in playback order.
+    Scene sampling falls back to uniform sampling when it finds too few scene changes.
+    """
+    duration = await probe_duration_seconds(local_path)
+
+    with tempfile.TemporaryDirectory(prefix="keyframes_") as temp_dir:
+        frames: List[Path] = []
+
+        if sampling == "scene":
+            scene_dir = Path(temp_dir) / "scene"
+            scene_dir.mkdir()
+            timestamps = _spread_over_duration(await detect_scene_changes(local_path), budget, duration)
+            if len(timestamps) < max(2, budget // 2):
+                logging.info(f"Only {len(timestamps)} scene changes in {local_path}; using uniform sampling.")
+            else:
+                frames = await _extract_frames_at(local_path, scene_dir, timestamps)
+
+        if not frames:
+            uniform_dir = Path(temp_dir) / "uniform"
+            uniform_dir.mkdir()
+            fps = budget / duration if duration else 1.0
+            frames = await _extract_frames(local_path, uniform_dir, f"fps={fps:.6f}", budget)
+
+        logging.info(f"Extracted {len(frames)} keyframes from {local_path}")
+        return [frame.read_bytes() for frame in frames]
@@ -1,36 +1,164 @@
+"""
+Link Analyzer
+==============
+Summarizes linked pages. LINK_ANALYSIS_ENGINE selects how:
+- "search" (default): Google Custom Search on the URL, snippets summarized.
+- "fetch": the page is fetched and read directly (see link_fetcher).
+
+The search client is built once from the discovery document bundled with
+google-api-python-client (no schema fetch), and each executor thread keeps
+its own httplib2 connection, since httplib2 is not thread-safe. Results are
+cached by normalized URL for LINK_ANALYSIS_CACHE_TTL_SECONDS, and concurrent
+lookups of the same link share one search, so a widely shared link is
+searched and summarized once per TTL window rather than once per tweet.
+"""
+
 import os
+import time
 import asyncio
 import logging
+import threading
+import weakref
+import httplib2
 from googleapiclient.discovery import build
-from typing import Dict, Any, List
+from googleapiclient.errors import HttpError
+from typing import Dict, Any, List, Optional
+from .analysis_cache import get_analysis_cache
 from .common_llm_utils import get_text_model  # Relative import
+from .link_fetcher import analyze_link_by_fetch
+from ..shared_lib.rate_limiter import get_rate_limiter
+from ..shared_lib.utils import normalize_url
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_SEARCH_API_KEY")
 GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+LINK_ANALYSIS_ENGINE = os.getenv("LINK_ANALYSIS_ENGINE", "search").lower()
+LINK_ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("LINK_ANALYSIS_CACHE_TTL_SECONDS", str(6 * 3600)))
+# Bump when a summary prompt changes. Summaries are cached and shared per URL, so the
+# prompts must not depend on the tweet; relating the link to the tweet is left to later stages.
+LINK_ANALYSIS_PROMPT_VERSION = "link-v2"
+
+_search_service = None
+_search_service_lock = threading.Lock()
+_thread_local = threading.local()
+_inflight_lookups: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = weakref.WeakKeyDictionary()
+
+
+def get_search_service():
+    """Returns the shared Custom Search client, built on first use from the bundled discovery document."""
+    global _search_service
+    if _search_service is None:
+        with _search_service_lock:
+            if _search_service is None:
+                _search_service = build(
+                    "customsearch", "v1", developerKey=GOOGLE_API_KEY,
+                    static_discovery=True, cache_discovery=False
+                )
+    return _search_service
+
+
+def _thread_http() -> httplib2.Http:
+    """httplib2 connection owned by the current executor thread."""
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = _thread_local.http = httplib2.Http(timeout=30)
+    return http
+
+
+async def _execute_search(service, query: str) -> Dict[str, Any]:
+    """Runs the Custom Search request paced by the shared limiter, retrying 429/5xx with backoff."""
+    limiter = get_rate_limiter("google_search")
+    loop = asyncio.get_running_loop()
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        try:
+            return await loop.run_in_executor(
+                None, lambda: service.cse().list(q=query, cx=GOOGLE_CSE_ID, num=3).execute(http=_thread_http())
+            )
+        except HttpError as e:
+            delay = limiter.retry_delay(e.resp.status, e.resp, attempt)
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
+        attempt += 1
 
 async def analyze_link_content(url: str, tweet_text_context: str) -> Dict[str, Any]:
     """
-    Analyzes link content using Google Custom Search API.
+    Analyzes link content with the configured engine (Custom Search or page fetch).
+    Cached per normalized URL; the summary describes the link alone, so it is
+    valid for every tweet that shares it.
     """
-    print(f"CUSTOM_SEARCH: Analyzing URL: {url} (context: {tweet_text_context[:50]}...)")
-    if not GOOGLE_API_KEY or not GOOGLE_CSE_ID:
+    engine = "fetch" if LINK_ANALYSIS_ENGINE == "fetch" else "search"
+    print(f"LINK_ANALYSIS: Analyzing URL: {url} with {engine} engine (context: {tweet_text_context[:50]}...)")
+    if engine == "search" and (not GOOGLE_API_KEY or not GOOGLE_CSE_ID):
         error_msg = "Configuration error: GOOGLE_SEARCH_API_KEY or GOOGLE_CSE_ID not set."
         print(f"CUSTOM_SEARCH: {error_msg}")
         return {"summary": None, "search_results": [], "error": error_msg}
 
+    cache_key = f"link:{engine}:{LINK_ANALYSIS_PROMPT_VERSION}:{normalize_url(url)}"
+    cached_result = await _get_cached_link_analysis(cache_key)
+    if cached_result:
+        print(f"CUSTOM_SEARCH: Cache hit for {url}")
+        return cached_result
+
+    inflight = _inflight_lookups.setdefault(asyncio.get_running_loop(), {})
+    task = inflight.get(cache_key)
+    if task is None:
+        analyze = analyze_link_by_fetch if engine == "fetch" else _search_and_summarize
+        task = asyncio.ensure_future(_analyze_and_cache(cache_key, analyze, url, tweet_text_context))
+        inflight[cache_key] = task
+        task.add_done_callback(lambda _: inflight.pop(cache_key, None))
+    else:
+        print(f"CUSTOM_SEARCH: Joining in-flight lookup for {url}")
+    return await asyncio.shield(task)
+
+
+async def _analyze_and_cache(cache_key: str, analyze, url: str, tweet_text_context: str) -> Dict[str, Any]:
+    result = await analyze(url, tweet_text_context)
+    if not result.get("error"):
+        await _store_cached_link_analysis(cache_key, result)
+    return result
+
+
+async def _get_cached_link_analysis(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Entries carry their own timestamp: links expire much sooner than media analyses."""
+    cache = get_analysis_cache()
+    if not cache:
+        return None
+    try:
+        entry = await cache.aget(cache_key)
+    except Exception as e:
+        logging.warning(f"Link cache lookup failed for {cache_key}: {e}")
+        return None
+    if not entry or time.time() - entry.get("cached_at", 0) > LINK_ANALYSIS_CACHE_TTL_SECONDS:
+        return None
+    return entry.get("result")
+
+
+async def _store_cached_link_analysis(cache_key: str, result: Dict[str, Any]):
+    cache = get_analysis_cache()
+    if not cache:
+        return
+    try:
+        await cache.aset(cache_key, {"cached_at": time.time(), "result": result})
+    except Exception as e:
+        logging.warning(f"Failed to store link analysis in cache: {e}")
+
+
+async def _search_and_summarize(url: str, tweet_text_context: str) -> Dict[str, Any]:
+    """Searches for the link and summarizes the top results in the tweet's context."""
     search_results_list = []
     summary = None
 
     try:
-        loop = asyncio.get_running_loop()
-        service = await loop.run_in_executor(None, lambda: build("customsearch", "v1", developerKey=GOOGLE_API_KEY))
-        
+        service = get_search_service()
+
         query = f"{url}" 
         print(f"CUSTOM_SEARCH: Google query: {query}")
 
-        response = await loop.run_in_executor(None, lambda: service.cse().list(q=query, cx=GOOGLE_CSE_ID, num=3).execute())
+        response = await _execute_search(service, query)
 
         if 'items' in response:
             for item in response['items']:
@@ -43,7 +171,7 @@ async def analyze_link_content(url: str, tweet_text_context: str) -> Dict[str, A
             text_model = get_text_model()
             if search_results_list and text_model:
                 summary_snippets = [res.get('snippet', '') for res in search_results_list if res.get('snippet')]
-                summary_prompt = f"Summarize the following search results about '{url}' in the context of '{tweet_text_context}':\n\n" + "\n\n".join(summary_snippets)
+                summary_prompt = f"Summarize what the page at '{url}' is about, based on the following search results:\n\n" + "\n\n".join(summary_snippets)
                 summary_responses = await text_model.generate_content_async([summary_prompt])
                 summary = summary_responses.text.strip()
             elif search_results_list:
@@ -0,0 +1,282 @@
+"""
+Link Fetcher
+=============
+Link analysis that reads the page itself instead of searching for it.
+
+The page is fetched over a pooled aiohttp session with a size cap
+(LINK_FETCH_MAX_BYTES) and a time cap (LINK_FETCH_TIMEOUT_SECONDS), and
+redirects are followed by hand so every hop is checked. Title, meta and
+OpenGraph tags and the main text are extracted locally with html.parser,
+in a worker thread so large pages don't stall the event loop.
+The LLM is only asked for a summary when the main text is longer than
+LINK_SUMMARY_LLM_THRESHOLD_CHARS; shorter pages are summarized from their
+own title and description.
+
+Links to private, loopback, link-local or reserved addresses are refused
+unless LINK_FETCH_ALLOW_PRIVATE_HOSTS=true: IP literals are checked here,
+and hostnames by the public-address session's resolver on every connection,
+so a name (or a redirect) pointing at an internal address is refused too.
+"""
+
+import os
+import re
+import asyncio
+import ipaddress
+import aiohttp
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+from typing import Dict, Any, List, Optional
+
+from .common_llm_utils import get_text_model
+from ..shared_lib.http_clients import (
+    PrivateAddressError, get_aiohttp_session, get_public_aiohttp_session, is_public_address,
+)
+
+LINK_FETCH_TIMEOUT_SECONDS = float(os.getenv("LINK_FETCH_TIMEOUT_SECONDS", "10"))
+LINK_FETCH_MAX_BYTES = int(os.getenv("LINK_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+LINK_FETCH_MAX_REDIRECTS = int(os.getenv("LINK_FETCH_MAX_REDIRECTS", "5"))
+LINK_FETCH_ALLOW_PRIVATE_HOSTS = os.getenv("LINK_FETCH_ALLOW_PRIVATE_HOSTS", "false").lower() == "true"
+# Main text longer than this is summarized by the LLM; shorter pages are described from their metadata
+LINK_SUMMARY_LLM_THRESHOLD_CHARS = int(os.getenv("LINK_SUMMARY_LLM_THRESHOLD_CHARS", "1500"))
+LINK_SUMMARY_MAX_INPUT_CHARS = 12000
+LINK_FETCH_USER_AGENT = "Mozilla/5.0 (compatible; NekiraLinkPreview/1.0)"
+
+_READ_CHUNK_SIZE = 64 * 1024
+_HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+_LOCAL_SUMMARY_MAX_CHARS = 500
+
+
+class LinkFetchError(Exception):
+    """Raised when a page cannot be fetched or is not HTML."""
+
+
+class PageExtractor(HTMLParser):
+    """Collects <title>, meta/OpenGraph tags and readable text blocks from an HTML page."""
+
+    _SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form", "iframe"}
+    _BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "li", "blockquote", "pre", "td", "dd", "figcaption"}
+    _MAIN_TAGS = {"article", "main"}
+    _VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.meta: Dict[str, str] = {}
+        self.blocks: List[str] = []
+        self.main_blocks: List[str] = []
+        self._in_title = False
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._block_depth = 0
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._VOID_TAGS:
+            if tag == "meta":
+                self._handle_meta(dict(attrs))
+            return
+        if tag in self._SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self._MAIN_TAGS:
+            self._main_depth += 1
+        elif tag in self._BLOCK_TAGS:
+            if self._block_depth == 0:
+                self._buffer = []
+            self._block_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "meta":
+            self._handle_meta(dict(attrs))
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self._MAIN_TAGS:
+            self._main_depth = max(0, self._main_depth - 1)
+        elif tag in self._BLOCK_TAGS and self._block_depth:
+            self._block_depth -= 1
+            if self._block_depth == 0:
+                self._flush_block()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif self._block_depth and not self._skip_depth:
+            self._buffer.append(data)
+
+    def _handle_meta(self, attrs: Dict[str, Optional[str]]):
+        key = (attrs.get("property") or attrs.get("name") or "").strip().lower()
+        content = attrs.get("content")
+        if key and content and key not in self.meta:
+            self.meta[key] = _collapse_whitespace(content)
+
+    def _flush_block(self):
+        text = _collapse_whitespace("".join(self._buffer))
+        self._buffer = []
+        if len(text) < 3:
+            return
+        self.blocks.append(text)
+        if self._main_depth:
+            self.main_blocks.append(text)
+
+    def main_text(self) -> str:
+        """Text of <article>/<main> when it holds real content, otherwise of the whole page."""
+        blocks = self.main_blocks if sum(map(len, self.main_blocks)) >= 200 else self.blocks
+        return "\n".join(blocks)
+
+
+def _collapse_whitespace(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def extract_page_info(html: str) -> Dict[str, Any]:
+    """Title, description, site name, type and main text of an HTML document."""
+    parser = PageExtractor()
+    parser.feed(html)
+    parser.close()
+    meta = parser.meta
+    return {
+        "title": meta.get("og:title") or meta.get("twitter:title") or _collapse_whitespace(parser.title) or None,
+        "description": meta.get("og:description") or meta.get("twitter:description") or meta.get("description"),
+        "site_name": meta.get("og:site_name"),
+        "type": meta.get("og:type"),
+        "image": meta.get("og:image") or meta.get("twitter:image"),
+        "main_text": parser.main_text(),
+    }
+
+
+def _check_host_allowed(url: str, allow_private_hosts: bool):
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise LinkFetchError(f"unsupported scheme: {parts.scheme or 'none'}")
+    host = (parts.hostname or "").lower()
+    if not host:
+        raise LinkFetchError("URL has no host")
+    if allow_private_hosts:
+        return
+    if host == "localhost" or host.endswith(".localhost") or host.endswith(".local"):
+        raise LinkFetchError(f"refusing to fetch local host {host}")
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        # Hostnames are checked against their resolved addresses by the public-address session
+        return
+    if not is_public_address(host):
+        raise LinkFetchError(f"refusing to fetch private address {host}")
+
+
+async def fetch_page(url: str, allow_private_hosts: bool = LINK_FETCH_ALLOW_PRIVATE_HOSTS) -> Dict[str, Any]:
+    """
+    Fetches an HTML page within the size/time caps.
+    Returns final_url, status, html and whether the body was truncated; raises LinkFetchError.
+    """
+    session = get_aiohttp_session() if allow_private_hosts else get_public_aiohttp_session()
+    timeout = aiohttp.ClientTimeout(total=LINK_FETCH_TIMEOUT_SECONDS)
+    headers = {"User-Agent": LINK_FETCH_USER_AGENT, "Accept": "text/html,application/xhtml+xml"}
+
+    current_url = url
+    for _ in range(LINK_FETCH_MAX_REDIRECTS + 1):
+        _check_host_allowed(current_url, allow_private_hosts)
+        try:
+            async with session.get(current_url, headers=headers, timeout=timeout, allow_redirects=False) as response:
+                if response.status in (301, 302, 303, 307, 308) and response.headers.get("Location"):
+                    current_url = urljoin(current_url, response.headers["Location"])
+                    continue
+                if response.status != 200:
+                    raise LinkFetchError(f"HTTP {response.status}")
+
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type and content_type not in _HTML_CONTENT_TYPES:
+                    raise LinkFetchError(f"not an HTML page ({content_type})")
+
+                body = bytearray()
+                truncated = False
+                async for chunk in response.content.iter_chunked(_READ_CHUNK_SIZE):
+                    body.extend(chunk)
+                    if len(body) >= LINK_FETCH_MAX_BYTES:
+                        del body[LINK_FETCH_MAX_BYTES:]
+                        truncated = True
+                        break
+
+                return {
+                    "final_url": current_url,
+                    "status": response.status,
+                    "html": body.decode(response.charset or "utf-8", errors="replace"),
+                    "truncated": truncated,
+                }
+        except aiohttp.ClientConnectorError as e:
+            if isinstance(e.__cause__, PrivateAddressError):
+                raise LinkFetchError(f"refusing to fetch: {e.__cause__}") from e
+            raise LinkFetchError(f"request failed: {e}") from e
+        except aiohttp.ClientError as e:
+            raise LinkFetchError(f"request failed: {e}") from e
+        except TimeoutError as e:
+            raise LinkFetchError(f"timed out after {LINK_FETCH_TIMEOUT_SECONDS}s") from e
+    raise LinkFetchError(f"more than {LINK_FETCH_MAX_REDIRECTS} redirects")
+
+
+def _local_summary(page: Dict[str, Any]) -> str:
+    parts = [page.get("title"), page.get("description")]
+    if not page.get("description") and page.get("main_text"):
+        parts.append(page["main_text"])
+    summary = " - ".join(part for part in parts if part)
+    if len(summary) > _LOCAL_SUMMARY_MAX_CHARS:
+        summary = summary[:_LOCAL_SUMMARY_MAX_CHARS - 1].rstrip() + "…"
+    return summary or "The page has no readable title or text."
+
+
+async def analyze_link_by_fetch(url: str, tweet_text_context: str,
+                                allow_private_hosts: bool = LINK_FETCH_ALLOW_PRIVATE_HOSTS) -> Dict[str, Any]:
+    """
+    Fetches and reads the linked page. Same result shape as the search engine:
+    summary, search_results (here the page itself) and error, plus the extracted page info.
+    The summary ignores tweet_text_context so it can be cached per URL.
+    """
+    print(f"LINK_FETCH: Fetching URL: {url}")
+    try:
+        fetched = await fetch_page(url, allow_private_hosts)
+    except LinkFetchError as e:
+        print(f"LINK_FETCH: Could not fetch {url}: {e}")
+        return {"summary": None, "search_results": [], "error": f"Could not fetch link: {e}"}
+
+    page = await asyncio.to_thread(extract_page_info, fetched["html"])
+    main_text = page["main_text"]
+    summary = None
+    summary_source = "metadata"
+
+    text_model = get_text_model() if len(main_text) > LINK_SUMMARY_LLM_THRESHOLD_CHARS else None
+    if text_model:
+        summary_prompt = (
+            f"Summarize this web page ({fetched['final_url']}) in 2-3 sentences."
+            f"\n\nTitle: {page['title'] or 'unknown'}\n\n{main_text[:LINK_SUMMARY_MAX_INPUT_CHARS]}"
+        )
+        try:
+            response = await text_model.generate_content_async([summary_prompt])
+            summary = response.text.strip()
+            summary_source = "llm"
+        except Exception as e:
+            print(f"LINK_FETCH: LLM summary failed for {url}, using page metadata: {e}")
+    if not summary:
+        summary = _local_summary(page)
+
+    print(f"LINK_FETCH: {fetched['final_url']} -> '{page['title']}' ({len(main_text)} chars, summary from {summary_source})")
+    return {
+        "summary": summary,
+        "search_results": [{"title": page["title"] or fetched["final_url"], "link": fetched["final_url"], "snippet": page["description"]}],
+        "error": None,
+        "page": {
+            "final_url": fetched["final_url"],
+            "title": page["title"],
+            "description": page["description"],
+            "site_name": page["site_name"],
+            "type": page["type"],
+            "image": page["image"],
+            "text_length": len(main_text),
+            "truncated": fetched["truncated"],
+            "summary_source": summary_source,
+        },
+    }
@@ -0,0 +1,203 @@
+"""
+Perceptual Hash Index
+======================
+Near-duplicate lookup for previously analyzed images.
+Stores 64-bit dHashes in SQLite and finds matches within a Hamming
+distance using multi-index hashing: the hash is split into 16-bit
+chunks, each indexed separately, so a lookup only touches rows that
+share (or nearly share) at least one chunk with the query.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, List
+
+from PIL import Image
+
+from .analysis_cache import ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_ENABLED, ANALYSIS_CACHE_TTL_SECONDS
+from ..shared_lib.llm_utils import compute_image_dhash
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
+
+PHASH_DEDUP_ENABLED = os.getenv("PHASH_DEDUP_ENABLED", "true").lower() == "true"
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "6"))
+PHASH_INDEX_MAX_ENTRIES = int(os.getenv("PHASH_INDEX_MAX_ENTRIES", "500000"))
+
+HASH_BITS = 64
+CHUNK_COUNT = 4
+CHUNK_BITS = HASH_BITS // CHUNK_COUNT
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+_EVICTION_INTERVAL_WRITES = 1000
+
+
+def split_hash(phash: int) -> List[int]:
+    """Split a 64-bit hash into CHUNK_COUNT chunks, most significant first."""
+    return [(phash >> (CHUNK_BITS * (CHUNK_COUNT - 1 - i))) & _CHUNK_MASK for i in range(CHUNK_COUNT)]
+
+
+def chunk_variants(chunk: int, radius: int) -> List[int]:
+    """All chunk values within `radius` bit flips of `chunk`."""
+    variants = [chunk]
+    for distance in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), distance):
+            flipped = chunk
+            for bit in bits:
+                flipped ^= 1 << bit
+            variants.append(flipped)
+    return variants
+
+
+class PerceptualHashIndex:
+    """
+    SQLite-backed Hamming-distance index over image dHashes.
+
+    By the pigeonhole principle, two hashes within distance d share at
+    least one chunk within d // CHUNK_COUNT bits, so probing each chunk
+    column with those variants finds every match without a table scan.
+    """
+
+    def __init__(self, db_path: Path = ANALYSIS_CACHE_PATH,
+                 max_distance: int = PHASH_MAX_DISTANCE,
+                 ttl_seconds: int = ANALYSIS_CACHE_TTL_SECONDS,
+                 max_entries: int = PHASH_INDEX_MAX_ENTRIES):
+        self.db_path = Path(db_path)
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        chunk_columns = ", ".join(f"c{i} INTEGER NOT NULL" for i in range(CHUNK_COUNT))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS phash_index ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " namespace TEXT NOT NULL,"
+            " phash TEXT NOT NULL,"
+            f" {chunk_columns},"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        for i in range(CHUNK_COUNT):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_phash_index_c{i} ON phash_index (c{i})")
+        self._conn.commit()
+
+    def find(self, phash: int, namespace: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Returns (distance, value) of the closest entry within max_distance, or None."""
+        radius = self.max_distance // CHUNK_COUNT
+        clauses, params = [], []
+        for i, chunk in enumerate(split_hash(phash)):
+            variants = chunk_variants(chunk, radius)
+            clauses.append(f"c{i} IN ({', '.join('?' * len(variants))})")
+            params.extend(variants)
+
+        query = (
+            "SELECT phash, value FROM phash_index "
+            f"WHERE ({' OR '.join(clauses)}) AND namespace = ? AND created_at >= ?"
+        )
+        params.extend([namespace, time.time() - self.ttl_seconds])
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        best = None
+        for stored_hash, value in rows:
+            distance = bin(int(stored_hash, 16) ^ phash).count("1")
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, value)
+        if best is None:
+            return None
+        return best[0], json.loads(best[1])
+
+    def add(self, phash: int, namespace: str, value: Dict[str, Any]):
+        chunks = split_hash(phash)
+        chunk_names = ", ".join(f"c{i}" for i in range(CHUNK_COUNT))
+        placeholders = ", ".join("?" * (CHUNK_COUNT + 4))
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO phash_index (namespace, phash, {chunk_names}, value, created_at) VALUES ({placeholders})",
+                (namespace, f"{phash:016x}", *chunks, json.dumps(value, ensure_ascii=False), time.time())
+            )
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= _EVICTION_INTERVAL_WRITES:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then the oldest ones above max_entries."""
+        self._writes_since_eviction = 0
+        self._conn.execute("DELETE FROM phash_index WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM phash_index").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM phash_index WHERE id IN (SELECT id FROM phash_index ORDER BY id ASC LIMIT ?)",
+                (overflow,)
+            )
+            logging.info(f"Perceptual hash index evicted {overflow} oldest entries.")
+
+
+_phash_index: Optional[PerceptualHashIndex] = None
+
+
+def get_phash_index() -> Optional[PerceptualHashIndex]:
+    """Returns the shared perceptual hash index, or None if dedup is disabled or unavailable."""
+    global _phash_index
+    if not (PHASH_DEDUP_ENABLED and ANALYSIS_CACHE_ENABLED):
+        return None
+    if _phash_index is None:
+        try:
+            _phash_index = PerceptualHashIndex()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to open perceptual hash index at {ANALYSIS_CACHE_PATH}: {e}")
+            return None
+    return _phash_index
+
+
+def _compute_file_dhash(local_path: str) -> int:
+    with Image.open(local_path) as image:
+        return compute_image_dhash(image)
+
+
+async def find_near_duplicate_analysis(
+    local_path: str,
+    namespace: str
+) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """
+    Looks up the analysis of a visually near-identical image.
+    Returns (dhash, stored_result). dhash is None when the index is unavailable.
+    """
+    index = get_phash_index()
+    if not index:
+        return None, None
+    try:
+        dhash = await asyncio.to_thread(_compute_file_dhash, local_path)
+        match = await asyncio.to_thread(index.find, dhash, namespace)
+        if match:
+            distance, stored_result = match
+            logging.info(f"Near-duplicate image found for {local_path} (distance {distance})")
+            return dhash, stored_result
+        return dhash, None
+    except Exception as e:
+        logging.warning(f"Perceptual hash lookup failed for {local_path}: {e}")
+        return None, None
+
+
+async def index_image_analysis(dhash: Optional[int], namespace: str, result: Dict[str, Any]):
+    """Adds a successful analysis under a dhash from find_near_duplicate_analysis()."""
+    index = get_phash_index()
+    if not index or dhash is None or result.get("error"):
+        return
+    try:
+        await asyncio.to_thread(index.add, dhash, namespace, result)
+    except Exception as e:
+        logging.warning(f"Failed to add image to perceptual hash index: {e}")
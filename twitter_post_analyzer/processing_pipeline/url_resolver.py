@@ -0,0 +1,126 @@
+"""
+URL Resolver
+=============
+Expands t.co and other shortened links to the URL they point to.
+
+The tweet's own entities (`entities.urls[].expanded_url`, and the media
+links) are used first, so the common case costs no requests. Links not
+covered by entities are expanded with HEAD requests (GET when a shortener
+rejects HEAD), following redirects by hand only while they stay on
+shortener hosts, up to URL_RESOLVE_MAX_REDIRECTS hops. Expansions are
+stored in the persistent analysis cache, and different links are resolved
+concurrently.
+"""
+
+import os
+import asyncio
+import logging
+import aiohttp
+from urllib.parse import urljoin, urlsplit
+from typing import Dict, Any, Iterable, List, Optional
+
+from .analysis_cache import get_analysis_cache
+
+URL_RESOLVE_TIMEOUT_SECONDS = float(os.getenv("URL_RESOLVE_TIMEOUT_SECONDS", "5"))
+URL_RESOLVE_MAX_REDIRECTS = int(os.getenv("URL_RESOLVE_MAX_REDIRECTS", "5"))
+URL_RESOLVE_CONCURRENCY = int(os.getenv("URL_RESOLVE_CONCURRENCY", "8"))
+
+SHORTENER_HOSTS = {
+    "t.co", "bit.ly", "buff.ly", "ow.ly", "tinyurl.com", "dlvr.it",
+    "goo.gl", "lnkd.in", "trib.al", "fb.me", "ift.tt", "is.gd", "shorturl.at",
+}
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+
+def is_shortened_url(url: str) -> bool:
+    return (urlsplit(url).hostname or "").lower() in SHORTENER_HOSTS
+
+
+def entity_url_map(tweet: Dict[str, Any]) -> Dict[str, str]:
+    """Short URL -> expanded URL from the tweet's entities.urls and media entities."""
+    url_map = {}
+    for container in (tweet.get("entities") or {}, tweet.get("extendedEntities") or {}):
+        for entity in (container.get("urls") or []) + (container.get("media") or []):
+            short_url, expanded_url = entity.get("url"), entity.get("expanded_url")
+            if short_url and expanded_url:
+                url_map[short_url] = expanded_url
+    return url_map
+
+
+async def _expand(session: aiohttp.ClientSession, url: str) -> Optional[str]:
+    """Follows shortener redirects by hand; returns the first URL off a shortener host, or None."""
+    timeout = aiohttp.ClientTimeout(total=URL_RESOLVE_TIMEOUT_SECONDS)
+    current_url = url
+    for _ in range(URL_RESOLVE_MAX_REDIRECTS):
+        if not is_shortened_url(current_url):
+            return current_url
+        location = None
+        for method in ("HEAD", "GET"):
+            async with session.request(method, current_url, allow_redirects=False, timeout=timeout) as response:
+                if response.status in _REDIRECT_STATUSES:
+                    location = response.headers.get("Location")
+                    break
+                # Some shorteners answer HEAD with 4xx/405; retry the hop with GET (body is not read)
+                if method == "HEAD" and response.status >= 400:
+                    continue
+                break
+        if not location:
+            return None
+        current_url = urljoin(current_url, location)
+    return None if is_shortened_url(current_url) else current_url
+
+
+async def resolve_url(session: aiohttp.ClientSession, url: str) -> str:
+    """Expanded URL for a shortened link (cached), or the URL itself if it isn't shortened or can't be expanded."""
+    if not is_shortened_url(url):
+        return url
+
+    cache = get_analysis_cache()
+    cache_key = f"url:{url}"
+    if cache:
+        try:
+            cached = await cache.aget(cache_key)
+            if cached and cached.get("expanded_url"):
+                return cached["expanded_url"]
+        except Exception as e:
+            logging.warning(f"URL resolution cache lookup failed for {url}: {e}")
+
+    try:
+        expanded_url = await _expand(session, url)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logging.warning(f"Could not expand {url}: {e}")
+        return url
+    if not expanded_url:
+        logging.warning(f"Could not expand {url}: redirect chain too long or broken")
+        return url
+
+    if cache:
+        try:
+            await cache.aset(cache_key, {"expanded_url": expanded_url})
+        except Exception as e:
+            logging.warning(f"Failed to store URL resolution for {url}: {e}")
+    return expanded_url
+
+
+async def resolve_urls(
+    session: aiohttp.ClientSession,
+    urls: Iterable[str],
+    known: Optional[Dict[str, str]] = None
+) -> List[str]:
+    """
+    Resolves links in order, without duplicates. `known` (e.g. from entity_url_map)
+    is used first; the remaining shortened links are expanded concurrently.
+    """
+    known = known or {}
+    unique_urls = list(dict.fromkeys(urls))
+    to_expand = [url for url in unique_urls if url not in known and is_shortened_url(url)]
+
+    limiter = asyncio.Semaphore(URL_RESOLVE_CONCURRENCY)
+
+    async def bounded_resolve(url: str) -> str:
+        async with limiter:
+            return await resolve_url(session, url)
+
+    expanded = dict(zip(to_expand, await asyncio.gather(*(bounded_resolve(url) for url in to_expand))))
+    resolved = [known.get(url) or expanded.get(url) or url for url in unique_urls]
+    return list(dict.fromkeys(resolved))
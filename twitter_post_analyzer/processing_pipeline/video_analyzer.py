@@ -1,18 +1,50 @@
 import os
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from vertexai.generative_models import Part, GenerativeModel
-from .common_llm_utils import get_vision_model, initialize_vertex_ai # MODIFIED: Relative import
+from .common_llm_utils import get_vision_model, initialize_vertex_ai, VISION_MODEL_NAME # MODIFIED: Relative import
+from .analysis_cache import get_cached_analysis, store_cached_analysis
+from .keyframe_extractor import extract_keyframes, is_keyframe_extraction_available, KEYFRAME_BUDGET
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(module)s - %(message)s")
 
 # Max file size in MB for inlineData (slightly less than the actual API limit)
 MAX_INLINE_VIDEO_SIZE_MB = 19.0
 
-async def analyze_video_content(local_path: str, tweet_text_context: str) -> Dict[str, Any]:
+# Bump when the prompt below changes so cached descriptions are not reused
+VIDEO_ANALYSIS_PROMPT_VERSION = "video-v1"
+
+# "inline" sends the raw video, "keyframes" sends sampled frames,
+# "auto" sends inline when the file fits and keyframes otherwise
+VIDEO_ANALYSIS_MODE = os.getenv("VIDEO_ANALYSIS_MODE", "auto").lower()
+# Limits for videos analyzed through keyframes (no inline size limit applies)
+MAX_KEYFRAME_VIDEO_SIZE_MB = float(os.getenv("MAX_KEYFRAME_VIDEO_SIZE_MB", "200"))
+MAX_KEYFRAME_VIDEO_DURATION_SECONDS = int(os.getenv("MAX_KEYFRAME_VIDEO_DURATION_SECONDS", "900"))
+
+
+def keyframe_mode_enabled() -> bool:
+    """True if oversized or long videos can be analyzed through keyframes."""
+    return VIDEO_ANALYSIS_MODE in ("keyframes", "auto") and is_keyframe_extraction_available()
+
+
+async def _build_keyframe_contents(local_path: str, prompt_text: str) -> list:
+    """Builds the model input for keyframe mode: the sampled frames in order, then the prompt."""
+    frames = await extract_keyframes(local_path, KEYFRAME_BUDGET)
+    if not frames:
+        raise RuntimeError(f"No keyframes could be extracted from {local_path}")
+
+    frame_parts = [Part.from_data(data=frame, mime_type="image/jpeg") for frame in frames]
+    keyframe_prompt = (
+        f"The following {len(frames)} images are keyframes sampled in playback order from a single video. "
+        + prompt_text
+    )
+    return frame_parts + [keyframe_prompt]
+
+async def analyze_video_content(local_path: str, tweet_text_context: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
     """
     Analyzes video content using Google Gemini API.
-    Prioritizes inlineData for smaller videos, or suggests GCS upload for larger ones.
+    Sends small videos as inlineData; larger ones (or all, in "keyframes" mode)
+    as a batch of sampled keyframes when ffmpeg is available.
     """
     logging.info(f"Starting video analysis: {local_path}")
 
@@ -31,31 +63,28 @@ async def analyze_video_content(local_path: str, tweet_text_context: str) -> Dic
         file_size_bytes = os.path.getsize(local_path)
         file_size_mb = file_size_bytes / (1024 * 1024)
 
-        if file_size_mb > MAX_INLINE_VIDEO_SIZE_MB:
+        use_keyframes = VIDEO_ANALYSIS_MODE == "keyframes" or (
+            VIDEO_ANALYSIS_MODE == "auto" and file_size_mb > MAX_INLINE_VIDEO_SIZE_MB
+        )
+        if use_keyframes and not is_keyframe_extraction_available():
+            logging.warning("Keyframe analysis requested but ffmpeg/ffprobe are not installed.")
+            use_keyframes = False
+
+        if not use_keyframes and file_size_mb > MAX_INLINE_VIDEO_SIZE_MB:
             error_msg = (f"Video file {os.path.basename(local_path)} ({file_size_mb:.2f}MB) "
                          f"is too large for inlineData (limit ~{MAX_INLINE_VIDEO_SIZE_MB}MB). "
                          f"Skipping this file or use GCS upload method.")
             logging.warning(error_msg)
             return {"description": None, "source": "gemini_video", "error": error_msg}
 
-        logging.info(f"Video file size: {file_size_mb:.2f}MB. Suitable for inlineData.")
-
-        with open(local_path, "rb") as video_file:
-            video_bytes = video_file.read()
+        analysis_method = "keyframes" if use_keyframes else "inline"
+        logging.info(f"Video file size: {file_size_mb:.2f}MB. Analyzing via {analysis_method}.")
 
-        file_extension = os.path.splitext(local_path)[1].lower()
-        mime_map = {
-            ".mp4": "video/mp4",
-            ".mov": "video/quicktime",
-            ".webm": "video/webm",
-            ".avi": "video/avi",
-            ".mpeg": "video/mpeg",
-            ".mpg": "video/mpeg",
-        }
-        mime_type = mime_map.get(file_extension, "video/mp4")
-        logging.info(f"Determined MIME type: {mime_type} for file {local_path}")
-
-        video_part = Part.from_data(data=video_bytes, mime_type=mime_type)
+        cache_key, cached_result = await get_cached_analysis(
+            "video", local_path, VISION_MODEL_NAME, f"{VIDEO_ANALYSIS_PROMPT_VERSION}-{analysis_method}", content_hash
+        )
+        if cached_result:
+            return cached_result
 
         # The prompt provided by the user for video analysis
         prompt_text = (
@@ -66,8 +95,27 @@ async def analyze_video_content(local_path: str, tweet_text_context: str) -> Dic
             "If there are animals, specify their species. "
             "If it's an animation, describe the animation style."
         )
-        
-        contents = [video_part, prompt_text]
+
+        if use_keyframes:
+            contents = await _build_keyframe_contents(local_path, prompt_text)
+        else:
+            with open(local_path, "rb") as video_file:
+                video_bytes = video_file.read()
+
+            file_extension = os.path.splitext(local_path)[1].lower()
+            mime_map = {
+                ".mp4": "video/mp4",
+                ".mov": "video/quicktime",
+                ".webm": "video/webm",
+                ".avi": "video/avi",
+                ".mpeg": "video/mpeg",
+                ".mpg": "video/mpeg",
+            }
+            mime_type = mime_map.get(file_extension, "video/mp4")
+            logging.info(f"Determined MIME type: {mime_type} for file {local_path}")
+
+            video_part = Part.from_data(data=video_bytes, mime_type=mime_type)
+            contents = [video_part, prompt_text]
 
         logging.info(f"Sending video {os.path.basename(local_path)} for analysis to model {vision_model._model_name}...")
         
@@ -76,7 +124,9 @@ async def analyze_video_content(local_path: str, tweet_text_context: str) -> Dic
         description = response.text.strip()
         logging.info(f"Video analysis for {os.path.basename(local_path)} successful.")
         
-        return {"description": description, "source": f"{vision_model._model_name}_inline", "error": None}
+        result = {"description": description, "source": f"{vision_model._model_name}_{analysis_method}", "error": None}
+        await store_cached_analysis(cache_key, result)
+        return result
 
     except Exception as e:
         error_msg = f"Error during video analysis {local_path}: {e}"
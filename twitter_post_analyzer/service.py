@@ -0,0 +1,227 @@
+# twitter_post_analyzer/service.py
+"""
+Pipeline Service
+=================
+Resident worker process: warms up the agent pipeline once, accepts jobs
+over a local HTTP API and runs them from a bounded in-process queue with
+a fixed pool of concurrent workers.
+
+When the queue is full, new jobs are rejected with 503 and Retry-After
+instead of piling up. On shutdown the service stops accepting jobs,
+lets queued and running jobs finish (up to a drain timeout), and then
+closes the shared HTTP clients.
+
+Accepted jobs are recorded in the job store (in the "service" namespace,
+under the current run profile), so jobs that were queued or running when
+the process died are picked up again on the next start and resume from
+their last completed stage. Jobs from batch runs are never recovered here.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .job_store import get_job_store
+from .pipeline_runner import PipelineRunner
+from .shared_lib.http_clients import close_http_clients
+
+logger = logging.getLogger(__name__)
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "4"))
+SERVICE_QUEUE_MAX_DEPTH = int(os.getenv("SERVICE_QUEUE_MAX_DEPTH", "100"))
+SERVICE_DRAIN_TIMEOUT_SECONDS = float(os.getenv("SERVICE_DRAIN_TIMEOUT_SECONDS", "300"))
+# Finished jobs kept in memory for GET /jobs/{id}
+SERVICE_JOB_HISTORY = int(os.getenv("SERVICE_JOB_HISTORY", "1000"))
+SERVICE_RETRY_AFTER_SECONDS = 30
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full or draining."""
+
+
+class JobRequest(BaseModel):
+    tweet_url: str
+    id: Optional[str] = None
+
+
+class JobQueueService:
+    """Bounded job queue served by a pool of pipeline workers on one shared runner."""
+
+    def __init__(self, runner: Optional[PipelineRunner] = None,
+                 workers: int = SERVICE_WORKERS,
+                 max_depth: int = SERVICE_QUEUE_MAX_DEPTH):
+        self.runner = runner or PipelineRunner(job_store=get_job_store("service"))
+        self.worker_count = max(1, workers)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_depth)
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.in_flight = 0
+        self.draining = False
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        if self.runner.job_store:
+            self._workers.append(asyncio.create_task(self._recover_interrupted_jobs()))
+        logger.info(f"SERVICE: Started {self.worker_count} workers (queue depth limit {self.queue.maxsize}).")
+
+    async def submit(self, tweet_url: str, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queues a job without waiting; resubmitting an unfinished job id returns the existing job."""
+        if job_id and job_id in self.jobs and self.jobs[job_id]["status"] in ("queued", "running"):
+            return self.jobs[job_id]
+        if self.draining:
+            raise QueueFullError("service is shutting down")
+
+        job = {
+            "id": job_id or uuid.uuid4().hex,
+            "tweet_url": tweet_url,
+            "status": "queued",
+            "submitted_at": time.time(),
+        }
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"queue is full ({self.queue.maxsize} jobs waiting)")
+
+        self._track(job)
+        if self.runner.job_store:
+            await self.runner.job_store.aenqueue(job["id"], tweet_url)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None and self.runner.job_store:
+            job = await self.runner.job_store.aget(job_id)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.queue.maxsize,
+            "in_flight": self.in_flight,
+            "workers": self.worker_count,
+            "draining": self.draining,
+        }
+
+    async def drain(self, timeout: float = SERVICE_DRAIN_TIMEOUT_SECONDS):
+        """Stops accepting jobs, waits for queued and running ones, then stops the workers."""
+        self.draining = True
+        logger.info(f"SERVICE: Draining {self.queue.qsize()} queued and {self.in_flight} running jobs...")
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+            logger.info("SERVICE: All jobs finished.")
+        except asyncio.TimeoutError:
+            logger.warning(f"SERVICE: Drain timed out after {timeout}s; cancelling remaining jobs.")
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await close_http_clients()
+
+    async def _recover_interrupted_jobs(self):
+        """Re-queues jobs left queued or running by a previous process (waits for queue space)."""
+        interrupted = await asyncio.to_thread(self.runner.job_store.list_interrupted)
+        if interrupted:
+            logger.info(f"SERVICE: Recovering {len(interrupted)} interrupted jobs from the job store.")
+        for stored in interrupted:
+            if self.draining:
+                return
+            if stored["id"] in self.jobs:
+                # Resubmitted over HTTP while recovery was starting; queuing it again would run it twice
+                continue
+            job = {"id": stored["id"], "tweet_url": stored["tweet_url"], "status": "queued",
+                   "submitted_at": time.time(), "recovered": True}
+            self._track(job)
+            await self.queue.put(job)
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self.queue.get()
+            self.in_flight += 1
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            try:
+                result = await self.runner.run_one(job["tweet_url"], job["id"])
+                job["status"] = result["status"]
+                job["result"] = result
+            except asyncio.CancelledError:
+                job["status"] = "cancelled"
+                raise
+            except Exception as e:
+                logger.exception(f"SERVICE: Worker {index} failed on job {job['id']}: {e}")
+                job["status"] = "error"
+                job["result"] = {"status": "error", "message": str(e)}
+            finally:
+                job["finished_at"] = time.time()
+                self.in_flight -= 1
+                self.queue.task_done()
+            logger.info(f"SERVICE: Job {job['id']} {job['status']} in {job['finished_at'] - job['started_at']:.1f}s")
+
+    def _track(self, job: Dict[str, Any]):
+        self.jobs[job["id"]] = job
+        self.jobs.move_to_end(job["id"])
+        self._trim_history()
+
+    def _trim_history(self):
+        """Forget the oldest finished jobs beyond SERVICE_JOB_HISTORY (they stay in the job store)."""
+        excess = len(self.jobs) - SERVICE_JOB_HISTORY
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, job in self.jobs.items() if job["status"] not in ("queued", "running")][:excess]:
+            del self.jobs[job_id]
+
+
+def create_app(service: Optional[JobQueueService] = None) -> FastAPI:
+    """Builds the HTTP API around a job queue service (created on startup if not given)."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.service = service or JobQueueService()
+        app.state.service.start()
+        yield
+        await app.state.service.drain()
+
+    app = FastAPI(title="Nekira Agent Service", lifespan=lifespan)
+
+    @app.post("/jobs", status_code=202)
+    async def submit_job(request: JobRequest):
+        try:
+            job = await app.state.service.submit(request.tweet_url, request.id)
+        except QueueFullError as e:
+            return JSONResponse(
+                status_code=503,
+                content={"status": "error", "message": str(e)},
+                headers={"Retry-After": str(SERVICE_RETRY_AFTER_SECONDS)}
+            )
+        return {"job_id": job["id"], "status": job["status"], **app.state.service.stats()}
+
+    @app.get("/jobs/{job_id}")
+    async def get_job(job_id: str):
+        job = await app.state.service.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return job
+
+    @app.get("/health")
+    async def health():
+        return {"status": "draining" if app.state.service.draining else "ok", **app.state.service.stats()}
+
+    return app
+
+
+def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT, workers: int = SERVICE_WORKERS):
+    """Runs the service until SIGINT/SIGTERM, then drains before exiting."""
+    import uvicorn
+
+    app = create_app(JobQueueService(workers=workers))
+    uvicorn.run(app, host=host, port=port, timeout_graceful_shutdown=int(SERVICE_DRAIN_TIMEOUT_SECONDS))
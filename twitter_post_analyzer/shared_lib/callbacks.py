@@ -1,3 +1,34 @@
 # shared_lib/callbacks.py
+import logging
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .utils import is_replayable_output
+
+logger = logging.getLogger(__name__)
+
+
 def log_callback(message):
-    print(f"[Callback] {message}")
\ No newline at end of file
+    print(f"[Callback] {message}")
+
+
+def skip_completed_stage(output_key: str):
+    """
+    Builds a before_agent_callback that skips the agent when its output_key
+    is already in session.state (e.g. restored from the job store after a
+    restart), replaying the stored output as the agent's response. A stored
+    error or dry-run result is not replayed: the stage runs again.
+    """
+    def callback(callback_context: CallbackContext) -> Optional[types.Content]:
+        stored_output = callback_context.state.get(output_key)
+        if stored_output is None:
+            return None
+        if not is_replayable_output(stored_output):
+            logger.info(f"RESUME: {callback_context.agent_name} failed or was a dry run last time; running it again.")
+            return None
+        logger.info(f"RESUME: {callback_context.agent_name} already completed; reusing '{output_key}'.")
+        text = stored_output if isinstance(stored_output, str) else str(stored_output)
+        return types.Content(role="model", parts=[types.Part(text=text)])
+    return callback
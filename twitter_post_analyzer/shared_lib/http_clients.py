@@ -0,0 +1,150 @@
+# shared_lib/http_clients.py
+"""
+HTTP Client Registry
+=====================
+Process-wide, pooled HTTP clients shared by the tweet extractor, the
+generated-image saver and the Twitter client, so connections (TCP/TLS
+handshakes, DNS lookups) are reused across steps and jobs.
+
+Async clients are bound to an event loop, so one is kept per running
+loop. Call close_http_clients() before the loop shuts down.
+
+Links taken from tweets are fetched with get_public_aiohttp_session(),
+whose resolver refuses hosts that resolve to private, loopback,
+link-local or reserved addresses, so every connection (including each
+redirect hop) is checked against the addresses it actually connects to.
+"""
+
+import os
+import socket
+import asyncio
+import logging
+import weakref
+import ipaddress
+from typing import List
+
+import aiohttp
+from aiohttp.abc import AbstractResolver, ResolveResult
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS_PER_HOST", "10"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+HTTP_DNS_CACHE_TTL_SECONDS = int(os.getenv("HTTP_DNS_CACHE_TTL_SECONDS", "300"))
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_aiohttp_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+_public_aiohttp_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+_httpx_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+class PrivateAddressError(OSError):
+    """Raised by PublicAddressResolver when a host resolves to a non-public address."""
+
+
+def is_public_address(address: str) -> bool:
+    """True for globally routable unicast addresses (IPv4-mapped IPv6 is checked as IPv4)."""
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+class PublicAddressResolver(AbstractResolver):
+    """Resolves with the threaded resolver and refuses hosts with any non-public address."""
+
+    def __init__(self):
+        self._resolver = aiohttp.ThreadedResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET) -> List[ResolveResult]:
+        results = await self._resolver.resolve(host, port, family)
+        blocked = sorted({result["host"] for result in results if not is_public_address(result["host"])})
+        if blocked:
+            raise PrivateAddressError(f"{host} resolves to private address {', '.join(blocked)}")
+        return results
+
+    async def close(self):
+        await self._resolver.close()
+
+
+def _create_aiohttp_session(resolver=None) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_MAX_CONNECTIONS,
+        limit_per_host=HTTP_POOL_MAX_CONNECTIONS_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL_SECONDS,
+        resolver=resolver,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+def get_aiohttp_session() -> aiohttp.ClientSession:
+    """Returns the shared aiohttp session for the running event loop."""
+    loop = asyncio.get_running_loop()
+    session = _aiohttp_sessions.get(loop)
+    if session is None or session.closed:
+        session = _create_aiohttp_session()
+        _aiohttp_sessions[loop] = session
+        logger.info("HTTP_CLIENTS: Created shared aiohttp session.")
+    return session
+
+
+def get_public_aiohttp_session() -> aiohttp.ClientSession:
+    """
+    Returns the aiohttp session for untrusted URLs on the running event loop.
+    Connections to hosts resolving to non-public addresses fail with a
+    ClientConnectorError caused by PrivateAddressError. IP-literal hosts skip
+    the resolver, so callers must check those themselves (is_public_address).
+    """
+    loop = asyncio.get_running_loop()
+    session = _public_aiohttp_sessions.get(loop)
+    if session is None or session.closed:
+        session = _create_aiohttp_session(PublicAddressResolver())
+        _public_aiohttp_sessions[loop] = session
+        logger.info("HTTP_CLIENTS: Created public-address aiohttp session.")
+    return session
+
+
+def get_httpx_client() -> httpx.AsyncClient:
+    """Returns the shared httpx client for the running event loop (HTTP/2 when h2 is installed)."""
+    loop = asyncio.get_running_loop()
+    client = _httpx_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_POOL_MAX_CONNECTIONS_PER_HOST,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(90.0),
+        )
+        _httpx_clients[loop] = client
+        logger.info(f"HTTP_CLIENTS: Created shared httpx client (HTTP/2: {HTTP2_AVAILABLE}).")
+    return client
+
+
+async def close_http_clients():
+    """Closes the clients bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+
+    for sessions in (_aiohttp_sessions, _public_aiohttp_sessions):
+        session = sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    client = _httpx_clients.pop(loop, None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+    logger.info("HTTP_CLIENTS: Shared HTTP clients closed.")
@@ -45,6 +45,20 @@ def compress_image_to_bytes(image: Image.Image, max_size=(800, 800), quality=85,
             image.convert("RGB").save(byte_io, format="PNG")
         return byte_io.getvalue()
 
+def compute_image_dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Computes a difference hash (dHash) of a PIL Image as an int of hash_size**2 bits.
+    Re-encoded, resized or recompressed copies of an image hash to nearby values.
+    """
+    grayscale = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = list(grayscale.getdata())
+    dhash = 0
+    for row in range(hash_size):
+        row_start = row * (hash_size + 1)
+        for col in range(hash_size):
+            dhash = (dhash << 1) | (pixels[row_start + col] > pixels[row_start + col + 1])
+    return dhash
+
 class VertexAILLMInterface:
     def __init__(self,
                  project_id: str = GOOGLE_CLOUD_PROJECT_ID,
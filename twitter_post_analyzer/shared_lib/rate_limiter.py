@@ -0,0 +1,217 @@
+# shared_lib/rate_limiter.py
+"""
+Rate Limiter
+=============
+Per-endpoint token buckets shared by every outbound API client
+(twitterapi.io, Twitter v2 / media upload, Replicate, Google Custom Search).
+
+- Requests take a token before they are sent, so bursts from concurrent
+  jobs are paced instead of bouncing off the quota.
+- `x-rate-limit-remaining` / `x-rate-limit-reset` response headers re-pace
+  the bucket to the quota actually left in the current window, and a 429
+  with `Retry-After` pauses the whole bucket, not only the request that
+  hit it.
+- Retries (429, 5xx, transport errors) use jittered exponential backoff
+  and are bounded per request (RATE_LIMIT_MAX_RETRIES) and per endpoint by
+  a retry budget that only grows with successful traffic, so an outage
+  can't turn into a retry storm.
+- Non-idempotent requests (posting a tweet, creating a prediction) are sent
+  with `idempotent=False`: they are only retried on 429 and on errors that
+  happen before the request reaches the server (connect errors/timeouts),
+  so a read timeout or 5xx can't post or bill the same thing twice.
+
+Per-endpoint rates are set with RATE_LIMIT_<NAME>_RPS / RATE_LIMIT_<NAME>_BURST
+(e.g. RATE_LIMIT_TWITTERAPI_IO_RPS), falling back to ENDPOINT_DEFAULTS and
+then to RATE_LIMIT_DEFAULT_RPS / RATE_LIMIT_DEFAULT_BURST.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Mapping, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_DEFAULT_RPS = float(os.getenv("RATE_LIMIT_DEFAULT_RPS", "5"))
+RATE_LIMIT_DEFAULT_BURST = int(os.getenv("RATE_LIMIT_DEFAULT_BURST", "10"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "4"))
+RATE_LIMIT_BACKOFF_BASE_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_BASE_SECONDS", "1"))
+RATE_LIMIT_BACKOFF_MAX_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_MAX_SECONDS", "60"))
+# Each request earns this fraction of a retry; the balance is capped at RATE_LIMIT_RETRY_BUDGET_MAX
+RATE_LIMIT_RETRY_BUDGET_RATIO = float(os.getenv("RATE_LIMIT_RETRY_BUDGET_RATIO", "0.2"))
+RATE_LIMIT_RETRY_BUDGET_MAX = float(os.getenv("RATE_LIMIT_RETRY_BUDGET_MAX", "10"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# A 429 means the request was rejected, and a connect error means it was never sent: safe to repeat either
+NON_IDEMPOTENT_RETRYABLE_STATUS_CODES = {429}
+NON_IDEMPOTENT_RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# Built-in (rps, burst) for endpoints with published limits; Replicate allows 600 prediction creates/min
+ENDPOINT_DEFAULTS = {
+    "replicate": (10.0, 20),
+}
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.title())
+    return value
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    value = _header(headers, "retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token bucket plus retry policy for one endpoint."""
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.configured_rate = rate
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._retry_balance = RATE_LIMIT_RETRY_BUDGET_MAX
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        """Waits for a token (and for any pause from a 429 or an exhausted window)."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self._retry_balance = min(RATE_LIMIT_RETRY_BUDGET_MAX,
+                                              self._retry_balance + RATE_LIMIT_RETRY_BUDGET_RATIO)
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """Holds every request on this endpoint for `seconds`."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Re-paces the bucket from x-rate-limit-remaining / x-rate-limit-reset (epoch seconds)."""
+        remaining, reset = _header(headers, "x-rate-limit-remaining"), _header(headers, "x-rate-limit-reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining, window_left = int(remaining), float(reset) - time.time()
+        except ValueError:
+            return
+        if window_left <= 0:
+            self.rate = self.configured_rate
+            return
+        if remaining <= 0:
+            logger.warning(f"RATE_LIMITER: {self.name} quota exhausted; pausing {window_left:.0f}s until reset.")
+            self.pause(window_left)
+            self.rate = self.configured_rate
+            return
+        # Spread what is left of the window's quota evenly over the time left in it
+        self.rate = remaining / window_left
+        self.tokens = min(self.tokens, remaining)
+
+    def retry_delay(self, status: Optional[int], headers: Mapping[str, str], attempt: int,
+                    max_retries: int = RATE_LIMIT_MAX_RETRIES, idempotent: bool = True) -> Optional[float]:
+        """
+        Seconds to wait before retrying a response with `status` (None for a
+        transport error), or None if it must not be retried.
+        """
+        self.update_from_headers(headers)
+        retryable = RETRYABLE_STATUS_CODES if idempotent else NON_IDEMPOTENT_RETRYABLE_STATUS_CODES
+        if status is not None and status not in retryable:
+            return None
+        retry_after = parse_retry_after(headers)
+        if status == 429 and retry_after:
+            # Applies to everyone on this endpoint, even if this request isn't retried
+            self.pause(retry_after)
+        if attempt >= max_retries:
+            logger.warning(f"RATE_LIMITER: {self.name} giving up after {attempt + 1} attempts (status {status}).")
+            return None
+        if self._retry_balance < 1:
+            logger.warning(f"RATE_LIMITER: {self.name} retry budget exhausted; not retrying (status {status}).")
+            return None
+        self._retry_balance -= 1
+
+        # Full jitter keeps concurrent callers from retrying in lockstep
+        backoff = random.uniform(0, min(RATE_LIMIT_BACKOFF_MAX_SECONDS, RATE_LIMIT_BACKOFF_BASE_SECONDS * 2 ** attempt))
+        delay = max(backoff, retry_after or 0.0)
+        if status == 429:
+            self.pause(delay)
+        logger.info(f"RATE_LIMITER: {self.name} retrying in {delay:.1f}s (status {status}, attempt {attempt + 1}).")
+        return delay
+
+    async def send(self, request: Callable[[], Awaitable[httpx.Response]],
+                   max_retries: int = RATE_LIMIT_MAX_RETRIES, idempotent: bool = True) -> httpx.Response:
+        """
+        Sends an httpx request through the bucket, retrying per the policy above.
+        `request` is called once per attempt (so signed headers are rebuilt).
+        With idempotent=False only 429s and connect-phase errors are retried.
+        Returns the last response; re-raises the transport error if retries run out.
+        """
+        attempt = 0
+        while True:
+            await self.acquire()
+            try:
+                response = await request()
+            except httpx.TransportError as e:
+                if not idempotent and not isinstance(e, NON_IDEMPOTENT_RETRYABLE_ERRORS):
+                    # The request may have reached the server; repeating it could duplicate its effect
+                    raise
+                delay = self.retry_delay(None, {}, attempt, max_retries, idempotent)
+                if delay is None:
+                    raise
+            else:
+                delay = self.retry_delay(response.status_code, response.headers, attempt, max_retries, idempotent)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, RateLimiter]]" = weakref.WeakKeyDictionary()
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """Returns the limiter for an endpoint name on the running event loop."""
+    loop = asyncio.get_running_loop()
+    limiters = _limiters.setdefault(loop, {})
+    limiter = limiters.get(name)
+    if limiter is None:
+        env_name = name.upper()
+        default_rate, default_burst = ENDPOINT_DEFAULTS.get(name, (RATE_LIMIT_DEFAULT_RPS, RATE_LIMIT_DEFAULT_BURST))
+        limiter = RateLimiter(
+            name,
+            rate=float(os.getenv(f"RATE_LIMIT_{env_name}_RPS", str(default_rate))),
+            burst=int(os.getenv(f"RATE_LIMIT_{env_name}_BURST", str(default_burst))),
+        )
+        limiters[name] = limiter
+    return limiter
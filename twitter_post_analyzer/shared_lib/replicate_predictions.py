@@ -0,0 +1,169 @@
+# shared_lib/replicate_predictions.py
+"""
+Replicate Predictions
+======================
+Native async client for Replicate predictions over the shared httpx
+client. A prediction is created with one POST, then a single poller task
+per event loop checks every pending prediction each interval and resolves
+its future when it succeeds, fails or is cancelled. Waiting generations
+hold no threads, however many are in flight.
+
+Each prediction has its own timeout; on timeout, or when the awaiting
+task is cancelled (e.g. a speculative image that is no longer needed),
+the prediction is cancelled on Replicate as well. All requests share the
+"replicate" rate-limiter bucket.
+"""
+
+import os
+import asyncio
+import logging
+import weakref
+from typing import Dict, Any, Optional, Set
+
+import httpx
+
+from twitter_post_analyzer.constants import REPLICATE_API_TOKEN
+from .http_clients import get_httpx_client
+from .rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+REPLICATE_API_URL = "https://api.replicate.com/v1"
+REPLICATE_POLL_INTERVAL_SECONDS = float(os.getenv("REPLICATE_POLL_INTERVAL_SECONDS", "1.0"))
+REPLICATE_PREDICTION_TIMEOUT_SECONDS = float(os.getenv("REPLICATE_PREDICTION_TIMEOUT_SECONDS", "300"))
+
+_TERMINAL_STATUSES = {"succeeded", "failed", "canceled"}
+
+
+class ReplicatePredictionError(Exception):
+    """Raised when a prediction fails, is cancelled on Replicate, or times out."""
+
+
+class ReplicatePredictionManager:
+    """Creates predictions and resolves them from one shared poller."""
+
+    def __init__(self, api_token: Optional[str] = REPLICATE_API_TOKEN,
+                 poll_interval: float = REPLICATE_POLL_INTERVAL_SECONDS):
+        self.api_token = api_token
+        self.poll_interval = poll_interval
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._cancellations: Set[asyncio.Task] = set()
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_token}"}
+
+    async def run(self, model: str, input_payload: Dict[str, Any],
+                  timeout: float = REPLICATE_PREDICTION_TIMEOUT_SECONDS) -> Any:
+        """
+        Runs `model` ("owner/name") on `input_payload` and returns the prediction output.
+        Raises ReplicatePredictionError or httpx errors on failure.
+        """
+        if not self.api_token:
+            raise ReplicatePredictionError("REPLICATE_API_TOKEN is not configured")
+
+        response = await get_rate_limiter("replicate").send(lambda: get_httpx_client().post(
+            f"{REPLICATE_API_URL}/models/{model}/predictions",
+            json={"input": input_payload},
+            headers=self._headers(),
+        ), idempotent=False)  # a repeated create would start (and bill) a second prediction
+        response.raise_for_status()
+        prediction = response.json()
+        prediction_id = prediction["id"]
+        logger.info(f"REPLICATE_PREDICTIONS: Created prediction {prediction_id} for {model}")
+
+        future = asyncio.get_running_loop().create_future()
+        if not self._resolve(future, prediction):
+            self._pending[prediction_id] = future
+            self._ensure_poller()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self._cancel_remote(prediction_id)
+            raise ReplicatePredictionError(f"prediction {prediction_id} did not finish within {timeout}s")
+        except asyncio.CancelledError:
+            self._cancel_remote(prediction_id)
+            raise
+        finally:
+            self._pending.pop(prediction_id, None)
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _ensure_poller(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop(), name="replicate-poller")
+
+    async def _poll_loop(self):
+        """Polls all pending predictions every interval; exits once none are left."""
+        while self._pending:
+            await asyncio.sleep(self.poll_interval)
+            prediction_ids = list(self._pending)
+            results = await asyncio.gather(
+                *(self._fetch(prediction_id) for prediction_id in prediction_ids),
+                return_exceptions=True
+            )
+            for prediction_id, result in zip(prediction_ids, results):
+                future = self._pending.get(prediction_id)
+                if future is None or future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    # Transient poll errors (429, network) are retried next interval
+                    logger.warning(f"REPLICATE_PREDICTIONS: Polling {prediction_id} failed: {result}")
+                    continue
+                self._resolve(future, result)
+
+    async def _fetch(self, prediction_id: str) -> Dict[str, Any]:
+        # No retries here: the poller asks again next interval anyway
+        response = await get_rate_limiter("replicate").send(lambda: get_httpx_client().get(
+            f"{REPLICATE_API_URL}/predictions/{prediction_id}", headers=self._headers()
+        ), max_retries=0)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, prediction: Dict[str, Any]) -> bool:
+        """Completes the future if the prediction reached a terminal status."""
+        status = prediction.get("status")
+        if status not in _TERMINAL_STATUSES:
+            return False
+        if future.done():
+            return True
+        if status == "succeeded":
+            logger.info(f"REPLICATE_PREDICTIONS: Prediction {prediction.get('id')} succeeded")
+            future.set_result(prediction.get("output"))
+        else:
+            future.set_exception(ReplicatePredictionError(
+                f"prediction {prediction.get('id')} {status}: {prediction.get('error')}"
+            ))
+        return True
+
+    def _cancel_remote(self, prediction_id: str):
+        """Cancels the prediction on Replicate in the background so GPU time stops being billed."""
+        task = asyncio.create_task(self._send_cancel(prediction_id))
+        self._cancellations.add(task)
+        task.add_done_callback(self._cancellations.discard)
+
+    async def _send_cancel(self, prediction_id: str):
+        try:
+            response = await get_rate_limiter("replicate").send(lambda: get_httpx_client().post(
+                f"{REPLICATE_API_URL}/predictions/{prediction_id}/cancel", headers=self._headers()
+            ))
+            response.raise_for_status()
+            logger.info(f"REPLICATE_PREDICTIONS: Cancelled prediction {prediction_id}")
+        except httpx.HTTPError as e:
+            logger.warning(f"REPLICATE_PREDICTIONS: Could not cancel prediction {prediction_id}: {e}")
+
+
+_managers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ReplicatePredictionManager]" = weakref.WeakKeyDictionary()
+
+
+def get_prediction_manager() -> ReplicatePredictionManager:
+    """Returns the prediction manager for the running event loop."""
+    loop = asyncio.get_running_loop()
+    manager = _managers.get(loop)
+    if manager is None:
+        manager = ReplicatePredictionManager()
+        _managers[loop] = manager
+    return manager
@@ -0,0 +1,48 @@
+# shared_lib/speculation.py
+"""
+Speculative Tasks
+==================
+Registry of background tasks started ahead of the stage that consumes
+them (e.g. image generation kicked off as soon as the character reply
+asks for an image), keyed by session id and task name so the consuming
+stage can await the result or cancel it.
+"""
+
+import asyncio
+import logging
+from typing import Any, Coroutine, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_tasks: Dict[str, Dict[str, asyncio.Task]] = {}
+
+
+def start_speculative_task(session_id: str, name: str, coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """Starts `coro` in the background, replacing (and cancelling) any task with the same name."""
+    session_tasks = _tasks.setdefault(session_id, {})
+    previous = session_tasks.pop(name, None)
+    if previous and not previous.done():
+        previous.cancel()
+    task = asyncio.create_task(coro, name=f"speculative-{name}-{session_id}")
+    session_tasks[name] = task
+    logger.info(f"SPECULATION: Started '{name}' for session {session_id}")
+    return task
+
+
+def take_speculative_task(session_id: str, name: str) -> Optional[asyncio.Task]:
+    """Removes and returns the named task for a session; the caller awaits or cancels it."""
+    session_tasks = _tasks.get(session_id)
+    if not session_tasks:
+        return None
+    task = session_tasks.pop(name, None)
+    if not session_tasks:
+        del _tasks[session_id]
+    return task
+
+
+def cancel_speculative_tasks(session_id: str):
+    """Cancels every unconsumed task of a session (e.g. when the pipeline ends early)."""
+    for name, task in _tasks.pop(session_id, {}).items():
+        if not task.done():
+            task.cancel()
+            logger.info(f"SPECULATION: Cancelled '{name}' for session {session_id}")
@@ -0,0 +1,49 @@
+# shared_lib/tool_step.py
+"""
+Tool Step
+==========
+Base class for deterministic pipeline steps: plain code that reads
+session.state, calls a tool function directly and writes its result to
+an output_key, without an LLM round trip to route the data.
+"""
+
+import abc
+import json
+from typing import Any, AsyncGenerator, Dict
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from .callbacks import skip_completed_stage
+
+
+class ToolStep(BaseAgent):
+    """
+    Runs run_step() and stores its dict result in session.state[output_key]
+    as a JSON string, the same shape the equivalent LlmAgent would write.
+    Skipped when output_key is already in state (see skip_completed_stage).
+    """
+
+    output_key: str
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        if self.before_agent_callback is None:
+            self.before_agent_callback = skip_completed_stage(self.output_key)
+
+    @abc.abstractmethod
+    async def run_step(self, ctx: InvocationContext) -> Dict[str, Any]:
+        """Does the step's work and returns the dict stored under output_key."""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        output = await self.run_step(ctx)
+        output_text = json.dumps(output, ensure_ascii=False, default=str)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=output_text)]),
+            actions=EventActions(state_delta={self.output_key: output_text}),
+        )
@@ -0,0 +1,225 @@
+# shared_lib/twitter_client.py
+"""
+Async Twitter Client
+=====================
+OAuth 1.0a (HMAC-SHA1) signed requests to the Twitter API v2 tweets
+endpoint and the v1.1 media upload, sent over the shared pooled httpx
+client so concurrent posts don't tie up executor threads.
+
+Large media goes through the chunked INIT/APPEND/FINALIZE flow: segments
+are appended in parallel, a failed segment is retried on its own instead
+of restarting the upload, and async processing is followed via STATUS.
+
+Every request goes through the shared rate limiter ("twitter_tweets" and
+"twitter_media" buckets), which paces requests from the x-rate-limit-*
+headers and retries 429/5xx with jittered backoff.
+
+Both upload paths accept the media bytes directly (media_bytes) so a file
+that was just downloaded into memory is not read back from disk.
+"""
+
+import os
+import asyncio
+import logging
+import mimetypes
+from pathlib import Path
+from typing import Dict, Any, Optional
+from urllib.parse import urlencode
+
+import httpx
+from oauthlib.oauth1 import Client as OAuth1Client
+
+from twitter_post_analyzer.constants import (
+    TWITTER_CONSUMER_KEY,
+    TWITTER_CONSUMER_SECRET,
+    TWITTER_ACCESS_TOKEN,
+    TWITTER_ACCESS_TOKEN_SECRET
+)
+from .http_clients import get_httpx_client
+from .rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+TWEETS_URL = "https://api.twitter.com/2/tweets"
+MEDIA_UPLOAD_URL = "https://upload.twitter.com/1.1/media/upload.json"
+
+# Twitter caps APPEND segments at 5 MB
+MEDIA_UPLOAD_CHUNK_SIZE = min(int(os.getenv("MEDIA_UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024))), 5 * 1024 * 1024)
+MEDIA_UPLOAD_PARALLEL_SEGMENTS = int(os.getenv("MEDIA_UPLOAD_PARALLEL_SEGMENTS", "4"))
+MEDIA_UPLOAD_SEGMENT_RETRIES = int(os.getenv("MEDIA_UPLOAD_SEGMENT_RETRIES", "3"))
+MEDIA_PROCESSING_TIMEOUT_SECONDS = int(os.getenv("MEDIA_PROCESSING_TIMEOUT_SECONDS", "300"))
+
+
+class MediaUploadError(Exception):
+    """Raised when a chunked media upload cannot be completed."""
+
+
+def _media_category(media_type: str) -> str:
+    if media_type == "image/gif":
+        return "tweet_gif"
+    if media_type.startswith("video/"):
+        return "tweet_video"
+    return "tweet_image"
+
+
+def _read_segment(path: str, offset: int, size: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+class AsyncTwitterClient:
+    """Signs each request with OAuth 1.0a user context and sends it with httpx."""
+
+    def __init__(self, consumer_key: str, consumer_secret: str,
+                 access_token: str, access_token_secret: str):
+        self._oauth = OAuth1Client(
+            consumer_key,
+            client_secret=consumer_secret,
+            resource_owner_key=access_token,
+            resource_owner_secret=access_token_secret,
+        )
+
+    def _auth_headers(self, method: str, url: str, form_params: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """
+        Builds the Authorization header for one request.
+        Only form-encoded parameters are part of the signature base string;
+        JSON and multipart bodies are not.
+        """
+        headers = {}
+        body = None
+        if form_params:
+            body = urlencode(form_params)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        _, signed_headers, _ = self._oauth.sign(url, http_method=method, body=body, headers=headers)
+        return {"Authorization": signed_headers["Authorization"]}
+
+    async def post_form(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        """POSTs form-encoded parameters (included in the signature)."""
+        params = {k: str(v) for k, v in params.items()}
+        return await get_rate_limiter("twitter_media").send(lambda: get_httpx_client().post(
+            url, data=params, headers=self._auth_headers("POST", url, form_params=params)
+        ))
+
+    async def get_signed(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        """GETs with query parameters (included in the signature)."""
+        signed_url = f"{url}?{urlencode({k: str(v) for k, v in params.items()})}"
+        return await get_rate_limiter("twitter_media").send(lambda: get_httpx_client().get(
+            signed_url, headers=self._auth_headers("GET", signed_url)
+        ))
+
+    async def post_tweet(self, payload: Dict[str, Any]) -> httpx.Response:
+        """POSTs a tweet payload to the v2 tweets endpoint (not retried once it may have been received)."""
+        return await get_rate_limiter("twitter_tweets").send(lambda: get_httpx_client().post(
+            TWEETS_URL, json=payload, headers=self._auth_headers("POST", TWEETS_URL)
+        ), idempotent=False)
+
+    async def upload_media_simple(self, image_path: str, media_bytes: Optional[bytes] = None) -> httpx.Response:
+        """Uploads an image in a single multipart request to the v1.1 media endpoint."""
+        if media_bytes is None:
+            media_bytes = await asyncio.to_thread(Path(image_path).read_bytes)
+        files = {"media": (Path(image_path).name, media_bytes)}
+        return await get_rate_limiter("twitter_media").send(lambda: get_httpx_client().post(
+            MEDIA_UPLOAD_URL, files=files, headers=self._auth_headers("POST", MEDIA_UPLOAD_URL)
+        ))
+
+    async def upload_media_chunked(self, media_path: str, media_type: Optional[str] = None,
+                                   media_bytes: Optional[bytes] = None) -> str:
+        """
+        Uploads media with INIT/APPEND/FINALIZE and waits for any async processing.
+        Returns the media_id_string; raises MediaUploadError or httpx errors on failure.
+        """
+        media_type = media_type or mimetypes.guess_type(media_path)[0] or "application/octet-stream"
+        total_bytes = len(media_bytes) if media_bytes is not None else os.path.getsize(media_path)
+
+        init_response = await self.post_form(MEDIA_UPLOAD_URL, {
+            "command": "INIT",
+            "total_bytes": total_bytes,
+            "media_type": media_type,
+            "media_category": _media_category(media_type),
+        })
+        init_response.raise_for_status()
+        media_id = init_response.json()["media_id_string"]
+        logger.info(f"TWITTER_CLIENT: INIT media {media_id} ({total_bytes} bytes, {media_type})")
+
+        segments = [
+            (index, offset, min(MEDIA_UPLOAD_CHUNK_SIZE, total_bytes - offset))
+            for index, offset in enumerate(range(0, total_bytes, MEDIA_UPLOAD_CHUNK_SIZE))
+        ]
+        semaphore = asyncio.Semaphore(MEDIA_UPLOAD_PARALLEL_SEGMENTS)
+
+        async def append(index: int, offset: int, size: int):
+            async with semaphore:
+                if media_bytes is not None:
+                    chunk = media_bytes[offset:offset + size]
+                else:
+                    chunk = await asyncio.to_thread(_read_segment, media_path, offset, size)
+                await self._append_segment(media_id, chunk, index)
+
+        results = await asyncio.gather(*(append(*segment) for segment in segments), return_exceptions=True)
+        failed = [(segment[0], result) for segment, result in zip(segments, results) if isinstance(result, BaseException)]
+        if failed:
+            index, error = failed[0]
+            raise MediaUploadError(f"{len(failed)} of {len(segments)} segments failed for media {media_id} (segment {index}: {error})")
+
+        finalize_response = await self.post_form(MEDIA_UPLOAD_URL, {"command": "FINALIZE", "media_id": media_id})
+        finalize_response.raise_for_status()
+        processing_info = finalize_response.json().get("processing_info")
+        if processing_info:
+            await self._wait_for_processing(media_id, processing_info)
+
+        logger.info(f"TWITTER_CLIENT: Media {media_id} uploaded in {len(segments)} segments")
+        return media_id
+
+    async def _append_segment(self, media_id: str, chunk: bytes, index: int):
+        """APPENDs one segment, retrying only this segment on transient errors."""
+        fields = {"command": "APPEND", "media_id": media_id, "segment_index": str(index)}
+        try:
+            response = await get_rate_limiter("twitter_media").send(
+                lambda: get_httpx_client().post(
+                    MEDIA_UPLOAD_URL, data=fields, files={"media": ("blob", chunk)},
+                    headers=self._auth_headers("POST", MEDIA_UPLOAD_URL)
+                ),
+                max_retries=MEDIA_UPLOAD_SEGMENT_RETRIES
+            )
+        except httpx.TransportError as e:
+            raise MediaUploadError(f"segment {index} failed: {str(e) or type(e).__name__}")
+        if response.is_error:
+            raise MediaUploadError(f"segment {index} failed: HTTP {response.status_code}")
+
+    async def _wait_for_processing(self, media_id: str, processing_info: Dict[str, Any]):
+        """Polls STATUS until the uploaded media has finished processing."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + MEDIA_PROCESSING_TIMEOUT_SECONDS
+
+        while processing_info.get("state") in ("pending", "in_progress"):
+            if loop.time() >= deadline:
+                raise MediaUploadError(f"media {media_id} still processing after {MEDIA_PROCESSING_TIMEOUT_SECONDS}s")
+            await asyncio.sleep(processing_info.get("check_after_secs", 1))
+            status_response = await self.get_signed(MEDIA_UPLOAD_URL, {"command": "STATUS", "media_id": media_id})
+            status_response.raise_for_status()
+            processing_info = status_response.json().get("processing_info", {})
+            logger.info(
+                f"TWITTER_CLIENT: Media {media_id} processing: {processing_info.get('state')} "
+                f"({processing_info.get('progress_percent', 0)}%)"
+            )
+
+        if processing_info.get("state") == "failed":
+            error = processing_info.get("error", {})
+            raise MediaUploadError(f"media {media_id} processing failed: {error.get('message', error)}")
+
+
+_twitter_client: Optional[AsyncTwitterClient] = None
+
+
+def get_twitter_client() -> AsyncTwitterClient:
+    """Returns the shared Twitter client built from the configured credentials."""
+    global _twitter_client
+    if _twitter_client is None:
+        _twitter_client = AsyncTwitterClient(
+            TWITTER_CONSUMER_KEY,
+            TWITTER_CONSUMER_SECRET,
+            TWITTER_ACCESS_TOKEN,
+            TWITTER_ACCESS_TOKEN_SECRET
+        )
+    return _twitter_client
@@ -3,6 +3,10 @@ import os
 import json
 import logging
 import aiofiles
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a link was shared from
+TRACKING_QUERY_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref_src", "ref_url"}
 
 def setup_logging():
     """Setup logging configuration."""
@@ -45,4 +49,56 @@ async def load_json(filename, analysis_id):
     async with aiofiles.open(filepath, "r", encoding="utf-8") as f:
         data = json.loads(await f.read())
     logging.info(f"Loaded data from {filepath}")
-    return data
\ No newline at end of file
+    return data
+
+
+def parse_json_output(raw):
+    """
+    Parse a JSON object stored in session.state by an agent.
+    Accepts a dict, or a string optionally wrapped in a ```json code fence.
+    Returns the dict, or None if it cannot be parsed.
+    """
+    if isinstance(raw, dict):
+        return raw
+    if not isinstance(raw, str):
+        return None
+    text = raw.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        logging.warning(f"Could not parse agent output as JSON: {raw[:200]}")
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+# Stage results that must not be stored or replayed as a completed stage:
+# errors should be retried, and a dry run did not post anything
+NON_REPLAYABLE_STATUSES = ("error", "dry_run")
+
+
+def is_replayable_output(raw) -> bool:
+    """False if an agent's stored output is an error or dry-run result."""
+    parsed = parse_json_output(raw)
+    return not (parsed and parsed.get("status") in NON_REPLAYABLE_STATUSES)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for cache keys: lowercase scheme and host, no
+    default port, fragment or trailing slash, tracking parameters (utm_*,
+    fbclid, ...) removed and the remaining query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_QUERY_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
@@ -3,11 +3,18 @@ Character Agent (Nekira)
 ========================
 Analyzes tweet content and generates character-appropriate responses.
 Decides whether an image should be generated.
+
+The single-call variant also writes the image scene description in the
+same structured response, so the generation prompt can be assembled in
+code instead of by a separate prompt-formatter LLM call.
 """
 
 import logging
 from pathlib import Path
+from typing import Optional
+from pydantic import BaseModel, Field
 from google.adk.agents.llm_agent import LlmAgent
+from ...shared_lib.callbacks import skip_completed_stage
 
 logger = logging.getLogger(__name__)
 
@@ -102,5 +109,42 @@ character_agent = LlmAgent(
     description="Analyzes tweet report content (from session.state) as if witnessing a live event. Responds as Nekira, understanding conversation flows and media. Formulates reply text and an optional image concept, potentially for self-expression. Outputs a JSON bundle.",
     tools=[],
     instruction=complete_agent_instructions,
-    output_key="character_agent_output_json"
-)
\ No newline at end of file
+    output_key="character_agent_output_json",
+    before_agent_callback=skip_completed_stage("character_agent_output_json")
+)
+
+
+class CharacterResponse(BaseModel):
+    """Structured output of the single-call character agent."""
+    reply_text: str = Field(description="Nekira's reply, max 280 characters, no hashtags.")
+    image_needed: bool = Field(description="Whether an image should accompany the reply.")
+    image_concept: Optional[str] = Field(default=None, description="High-level image idea, or null.")
+    image_scene: Optional[str] = Field(
+        default=None,
+        description="Detailed scene for the image generator (pose, expression, framing, background, other elements), "
+                    "without Nekira's base appearance or art style. Null when no image is needed."
+    )
+
+
+single_call_instructions = complete_agent_instructions + """
+
+**7. Image Scene (single-call mode):**
+    -   IF `image_needed` is `true`, also write `image_scene`: one coherent paragraph that tells an image generator exactly what to draw.
+        *   Nekira's action, pose and expression, matching your `reply_text` and personality.
+        *   Framing and composition (close-up, low angle, full body, silhouette...).
+        *   Background and environment, only if it differs from or adapts her usual rainy neon Neo-Kyodo.
+        *   Any other characters or objects and how she interacts with them, plus a few style keywords (e.g. "volumetric fog", "lens flare").
+    -   Do NOT describe her hair, outfit, implants or the art style; those are added automatically.
+    -   IF `image_needed` is `false`, `image_scene` MUST be `null`.
+    -   Your output is a JSON object with the keys `reply_text`, `image_needed`, `image_concept` and `image_scene`.
+"""
+
+character_single_call_agent = LlmAgent(
+    name="NekaraCharacterSingleCallAgent",
+    model="gemini-2.5-flash-preview-05-20",
+    description="Responds as Nekira and, when an image is wanted, describes the image scene in the same structured response.",
+    instruction=single_call_instructions,
+    output_schema=CharacterResponse,
+    output_key="character_agent_output_json",
+    before_agent_callback=skip_completed_stage("character_agent_output_json")
+)
@@ -3,16 +3,50 @@ Image Generator Agent
 ======================
 Generates AI images using Replicate API when the character decides an image is needed.
 Bundles all data for the PostReplyAgent.
+Available as an LlmAgent and as a deterministic step that calls the tool directly.
+
+With speculative generation, SpeculativeImageStart runs right after the
+character stage and starts Replicate in the background on the prompt
+PromptAssemblyStep will build from the character's scene; ImageGenerationStep
+then awaits that image, or cancels it if the reply ends up without an
+image, without postable text, or with a different image prompt. Only the
+image the reply will carry is pre-uploaded to Twitter, from this step.
 """
 
+import os
 import logging
+from typing import AsyncGenerator, Dict, Any, Optional
+from google.adk.agents import BaseAgent
 from google.adk.agents.llm_agent import LlmAgent
+from google.adk.events import Event
 from google.adk.tools.function_tool import FunctionTool
 from ...constants import MODEL
+from ...shared_lib.callbacks import skip_completed_stage
+from ...shared_lib.speculation import start_speculative_task, take_speculative_task
+from ...shared_lib.tool_step import ToolStep
+from ...shared_lib.utils import parse_json_output
+from ..post_reply_agent.tool.post_tweet_reply_tool import prepare_reply_text, start_media_pre_upload
+from ..prompt_formatter_agent.agent import assemble_image_prompt, load_character_visuals
 from .tool.image_generator_tool import generate_image_via_replicate_sdk
 
 logger = logging.getLogger(__name__)
 
+SPECULATIVE_IMAGE_TASK = "image_generation"
+
+
+def image_generation_skipped() -> bool:
+    return os.getenv("SKIP_IMAGE_GENERATION", "false").lower() == "true"
+
+
+def speculative_image_prompt(character_output: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The prompt a speculative image is generated from, or None if the character asked for no image."""
+    if not character_output or not character_output.get("image_needed"):
+        return None
+    scene = character_output.get("image_scene") or character_output.get("image_concept")
+    if not scene or not str(scene).strip():
+        return None
+    return assemble_image_prompt(scene, load_character_visuals())
+
 # Create the image generation tool
 replicate_image_generation_tool = FunctionTool(
     func=generate_image_via_replicate_sdk,
@@ -26,6 +60,7 @@ image_generator_agent = LlmAgent(
         replicate_image_generation_tool
     ],
     output_key="image_generation_results",
+    before_agent_callback=skip_completed_stage("image_generation_results"),
     instruction="""## Your Role: Image Generation Executor & Final Data Bundler for Posting
 
 Your only job is to look at the `"generate_this_image"` flag from the `ImagePromptFormatterAgent` output in the context and follow one of two exact scenarios.
@@ -69,4 +104,94 @@ Your only job is to look at the `"generate_this_image"` flag from the `ImageProm
 
 **Your entire response must be ONLY the final JSON object from the scenario you followed.**
 """
-)
\ No newline at end of file
+)
+
+
+class SpeculativeImageStart(BaseAgent):
+    """Starts image generation from the character output without waiting for the prompt formatter."""
+
+    async def _run_async_impl(self, ctx) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        character_output = parse_json_output(state.get("character_agent_output_json"))
+        prompt = speculative_image_prompt(character_output)
+        if "image_generation_results" not in state and not image_generation_skipped() and prompt:
+            prep_results = parse_json_output(state.get("tweet_prep_results")) or {}
+            start_speculative_task(ctx.session.id, SPECULATIVE_IMAGE_TASK, generate_image_via_replicate_sdk(
+                prompt=prompt,
+                image_name_prefix=prep_results.get("analysis_id") or "image",
+                aspect_ratio="1:1",
+                output_format="jpg",
+            ))
+        return
+        yield
+
+
+class ImageGenerationStep(ToolStep):
+    """Generates the image when the formatter asked for one, then bundles the data for posting."""
+
+    async def run_step(self, ctx) -> Dict[str, Any]:
+        params = parse_json_output(ctx.session.state.get("image_generation_params")) or {}
+        prep_results = parse_json_output(ctx.session.state.get("tweet_prep_results")) or {}
+        speculative_image = take_speculative_task(ctx.session.id, SPECULATIVE_IMAGE_TASK)
+
+        # Validated while a speculative image may still be rendering
+        reply_text = prepare_reply_text(params.get("final_reply_text"))
+        bundle = {
+            "main_post_id_to_reply_to": prep_results.get("main_post_id_to_reply_to"),
+            "final_reply_text": reply_text,
+            "final_generated_image_path": None,
+            "image_generation_outcome_message": params.get("formatter_status_message", "No image requested."),
+        }
+
+        wants_image = bool(params.get("generate_this_image") and params.get("actual_image_prompt_for_generation"))
+        if not wants_image or image_generation_skipped() or not reply_text or not bundle["main_post_id_to_reply_to"]:
+            if speculative_image and not speculative_image.done():
+                speculative_image.cancel()
+                logger.info("IMAGE_GENERATION_STEP: Reply will not carry an image; cancelled speculative generation.")
+            if wants_image and image_generation_skipped():
+                bundle["image_generation_outcome_message"] = "Skipped: image generation disabled (SKIP_IMAGE_GENERATION)."
+            return bundle
+
+        if speculative_image:
+            character_output = parse_json_output(ctx.session.state.get("character_agent_output_json"))
+            if speculative_image_prompt(character_output) != params["actual_image_prompt_for_generation"]:
+                # The image must follow the prompt the pipeline produced, not the raw concept
+                speculative_image.cancel()
+                speculative_image = None
+                logger.info("IMAGE_GENERATION_STEP: Formatted prompt differs from the speculative one; cancelled it.")
+
+        if speculative_image:
+            image_path = await speculative_image
+            if image_path:
+                start_media_pre_upload(image_path)
+                bundle["final_generated_image_path"] = image_path
+                bundle["image_generation_outcome_message"] = "Image generated speculatively from the assembled prompt."
+                return bundle
+            logger.warning("IMAGE_GENERATION_STEP: Speculative generation failed; generating from the formatted prompt.")
+
+        image_path = await generate_image_via_replicate_sdk(
+            prompt=params["actual_image_prompt_for_generation"],
+            image_name_prefix=params.get("image_name_prefix") or prep_results.get("analysis_id") or "image",
+            aspect_ratio=params.get("image_aspect_ratio") or "1:1",
+            output_format=params.get("image_output_format") or "jpg",
+        )
+        if image_path:
+            # Reply text and target are validated above, so this image will be posted
+            start_media_pre_upload(image_path)
+        bundle["final_generated_image_path"] = image_path
+        bundle["image_generation_outcome_message"] = (
+            "Image generated successfully." if image_path else "Image generation failed; posting text only."
+        )
+        return bundle
+
+
+image_generation_step = ImageGenerationStep(
+    name="ImageGenerationStep",
+    description="Generates the image if image_generation_params asks for one and bundles reply text, image path and target tweet ID into session.state.image_generation_results.",
+    output_key="image_generation_results"
+)
+
+speculative_image_start = SpeculativeImageStart(
+    name="SpeculativeImageStart",
+    description="Starts image generation in the background as soon as the character output asks for an image."
+)
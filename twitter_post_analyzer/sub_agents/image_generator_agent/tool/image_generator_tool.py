@@ -2,17 +2,26 @@
 Image Generator Tool
 =====================
 Generates images using Replicate API (Flux 1.1 Pro Ultra model).
+Predictions are created and awaited through the async prediction manager,
+so a pending generation doesn't hold an executor thread.
+
+The generated image is streamed to disk with async file writes. The tool
+does not upload anything to Twitter: the Twitter pre-upload is started by
+ImageGenerationStep, once it knows the image will be posted.
 """
 
+import os
+import aiofiles
 import httpx
 import logging
 import time
 from pathlib import Path
 from typing import Optional, Any
 import asyncio
-import replicate
 
 from ....constants import REPLICATE_API_TOKEN, REPLICATE_GENERATED_IMAGES_DIR, ensure_dir_exists
+from ....shared_lib.http_clients import get_httpx_client
+from ....shared_lib.replicate_predictions import ReplicatePredictionError, get_prediction_manager
 
 logger = logging.getLogger(__name__)
 
@@ -22,35 +31,54 @@ if not REPLICATE_API_TOKEN:
     logger.warning("REPLICATE_SDK_TOOL: REPLICATE_API_TOKEN not found. Image generation unavailable.")
 
 
-async def _save_image_from_url(image_url: str, output_path: Path) -> bool:
-    """Download and save image from URL to local path."""
+async def _save_image_from_url(image_url: str, output_path: Path) -> Optional[bytes]:
+    """
+    Stream image from URL to local path.
+    Returns the image bytes (also written to disk), or None on failure.
+    """
     if not image_url:
         logger.error("IMAGE_SAVE_TOOL: Cannot save image: image_url is None or empty.")
-        return False
+        return None
     
     try:
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            logger.info(f"IMAGE_SAVE_TOOL: Downloading image from: {image_url}")
-            response = await client.get(image_url)
+        client = get_httpx_client()
+        logger.info(f"IMAGE_SAVE_TOOL: Downloading image from: {image_url}")
+        ensure_dir_exists(output_path.parent)
+        image_bytes = bytearray()
+
+        async with client.stream("GET", image_url, timeout=90.0) as response:
             logger.info(f"IMAGE_SAVE_TOOL: Response status: {response.status_code}")
             response.raise_for_status()
-            
-            ensure_dir_exists(output_path.parent)
-            
-            with open(output_path, "wb") as f:
-                f.write(response.content)
-            
-            logger.info(f"IMAGE_SAVE_TOOL: Image saved: {output_path} ({output_path.stat().st_size / 1024:.2f} KB)")
-            return True
+            async with aiofiles.open(output_path, "wb") as f:
+                async for chunk in response.aiter_bytes():
+                    await f.write(chunk)
+                    image_bytes.extend(chunk)
+
+        if not image_bytes:
+            logger.error(f"IMAGE_SAVE_TOOL: Empty response body from {image_url}")
+            return None
+
+        logger.info(f"IMAGE_SAVE_TOOL: Image saved: {output_path} ({len(image_bytes) / 1024:.2f} KB)")
+        return bytes(image_bytes)
     
+    except asyncio.CancelledError:
+        _remove_partial_file(output_path)
+        raise
     except httpx.HTTPStatusError as e:
         logger.error(f"IMAGE_SAVE_TOOL: HTTP error downloading {image_url}: {e.response.status_code}")
     except httpx.RequestError as e:
         logger.error(f"IMAGE_SAVE_TOOL: Request error downloading {image_url}: {e}")
     except Exception as e:
         logger.error(f"IMAGE_SAVE_TOOL: Failed to save {image_url}: {e}", exc_info=True)
-    
-    return False
+
+    _remove_partial_file(output_path)
+    return None
+
+
+def _remove_partial_file(output_path: Path):
+    """Don't leave a truncated image behind after a failed or cancelled download."""
+    if output_path.exists():
+        os.remove(output_path)
 
 
 async def generate_image_via_replicate_sdk(
@@ -111,21 +139,10 @@ async def generate_image_via_replicate_sdk(
         logger.info(f"REPLICATE_SDK_TOOL: Calling model: {REPLICATE_MODEL_FOR_GENERATION}")
         logger.debug(f"REPLICATE_SDK_TOOL: Payload: {input_payload}")
 
-        # Run Replicate API call in executor (blocking call)
-        api_output = None
         try:
-            loop = asyncio.get_event_loop()
-            
-            def sync_replicate_run():
-                logger.info("REPLICATE_SDK_TOOL: Executing Replicate API call...")
-                output = replicate.run(REPLICATE_MODEL_FOR_GENERATION, input=input_payload)
-                logger.info(f"REPLICATE_SDK_TOOL: API call completed. Output type: {type(output)}")
-                return output
-
-            api_output = await loop.run_in_executor(None, sync_replicate_run)
-
-        except Exception as e:
-            logger.error(f"REPLICATE_SDK_TOOL: Error during replicate.run: {e}", exc_info=True)
+            api_output = await get_prediction_manager().run(REPLICATE_MODEL_FOR_GENERATION, input_payload)
+        except (ReplicatePredictionError, httpx.HTTPError) as e:
+            logger.error(f"REPLICATE_SDK_TOOL: Prediction failed: {e}")
             return None
 
         logger.info(f"REPLICATE_SDK_TOOL: Raw API output type: {type(api_output)}")
@@ -167,16 +184,14 @@ async def generate_image_via_replicate_sdk(
         output_file_path = REPLICATE_GENERATED_IMAGES_DIR / image_filename
         logger.info(f"REPLICATE_SDK_TOOL: Saving to: {output_file_path.resolve()}")
 
-        if await _save_image_from_url(output_image_url, output_file_path):
+        image_bytes = await _save_image_from_url(output_image_url, output_file_path)
+        if image_bytes:
             logger.info("REPLICATE_SDK_TOOL: Image saved successfully.")
             return str(output_file_path)
         else:
             logger.error("REPLICATE_SDK_TOOL: Failed to save image from URL.")
             return None
 
-    except replicate.exceptions.ReplicateError as e:
-        logger.error(f"REPLICATE_SDK_TOOL: Replicate API error: {e}", exc_info=True)
-        return None
     except Exception as e:
         logger.exception(f"REPLICATE_SDK_TOOL: Unexpected error: {e}")
         return None
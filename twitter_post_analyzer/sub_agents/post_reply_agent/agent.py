@@ -3,13 +3,20 @@ Post Reply Agent
 =================
 Posts replies to Twitter using the Twitter API v2.
 Handles media upload and tweet posting.
+Available as an LlmAgent and as a deterministic step that calls the tool directly.
 """
 
+import os
 import logging
+from typing import Dict, Any
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.tools.function_tool import FunctionTool
-from .tool.post_tweet_reply_tool import post_tweet_reply
+from .tool.post_tweet_reply_tool import post_tweet_reply, prepare_reply_text
 from ...constants import MODEL
+from ...shared_lib.callbacks import skip_completed_stage
+from ...shared_lib.speculation import cancel_speculative_tasks
+from ...shared_lib.tool_step import ToolStep
+from ...shared_lib.utils import parse_json_output
 
 logger = logging.getLogger(__name__)
 
@@ -68,5 +75,39 @@ Immediately call the `post_tweet_reply` tool with this data.
 **Step 4: Return Tool's Output**
     a. Your final output MUST be the exact `tool_output_dict`.
     b. STOP.
-"""
-)
\ No newline at end of file
+""",
+    output_key="post_reply_results",
+    before_agent_callback=skip_completed_stage("post_reply_results")
+)
+
+
+class PostReplyStep(ToolStep):
+    """Posts the bundled reply from image_generation_results (skipped in dry-run mode)."""
+
+    async def run_step(self, ctx) -> Dict[str, Any]:
+        # Nothing started speculatively is needed once we are posting (or not)
+        cancel_speculative_tasks(ctx.session.id)
+        bundle = parse_json_output(ctx.session.state.get("image_generation_results"))
+        if not bundle:
+            return {"status": "error", "message": "Failed to get bundled data for posting from image_generation_results."}
+
+        tweet_id = bundle.get("main_post_id_to_reply_to")
+        reply_text = prepare_reply_text(bundle.get("final_reply_text"))
+        image_path = bundle.get("final_generated_image_path")
+        if not tweet_id or not str(tweet_id).strip():
+            return {"status": "error", "message": "Missing target tweet ID in data from ImageGeneratorAgent."}
+        if not reply_text or not str(reply_text).strip():
+            return {"status": "error", "message": "Missing text content for reply in data from ImageGeneratorAgent."}
+
+        if os.getenv("DRY_RUN_MODE", "false").lower() == "true":
+            logger.info(f"POST_REPLY_STEP: Dry run - not posting reply to {tweet_id}: {reply_text[:50]}...")
+            return {"status": "dry_run", "tweet_id_to_reply_to": str(tweet_id), "text": reply_text, "image_path": image_path}
+
+        return await post_tweet_reply(str(tweet_id), reply_text, image_path)
+
+
+post_reply_step = PostReplyStep(
+    name="PostReplyStep",
+    description="Posts the reply bundled in session.state.image_generation_results and saves the result to session.state.post_reply_results.",
+    output_key="post_reply_results"
+)
@@ -3,14 +3,21 @@ Post Tweet Reply Tool
 ======================
 Posts replies to Twitter using the Twitter API v2.
 Handles media upload via v1.1 API.
+
+The image a reply will carry can be pre-uploaded as soon as that is
+decided (start_media_pre_upload, called by ImageGenerationStep);
+post_tweet_reply then only awaits the pending media_id before the single
+/2/tweets call.
 """
 
+import re
+import time
+import asyncio
 import logging
 import os
+import mimetypes
 import httpx
-import asyncio
-from requests_oauthlib import OAuth1Session
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from twitter_post_analyzer.constants import (
     TWITTER_CONSUMER_KEY,
@@ -18,39 +25,74 @@ from twitter_post_analyzer.constants import (
     TWITTER_ACCESS_TOKEN,
     TWITTER_ACCESS_TOKEN_SECRET
 )
+from twitter_post_analyzer.shared_lib.twitter_client import (
+    AsyncTwitterClient,
+    MediaUploadError,
+    get_twitter_client
+)
 
 logger = logging.getLogger(__name__)
 
+# Files above this size (and any non-image media) use the chunked upload
+MEDIA_CHUNKED_UPLOAD_THRESHOLD_MB = float(os.getenv("MEDIA_CHUNKED_UPLOAD_THRESHOLD_MB", "1"))
+
+MEDIA_PRE_UPLOAD_ENABLED = os.getenv("MEDIA_PRE_UPLOAD_ENABLED", "true").lower() == "true"
+# Pre-uploads never claimed by a post are dropped after this long
+_PENDING_UPLOAD_TTL_SECONDS = 3600
 
-async def _upload_media_to_twitter(image_path: str, oauth: OAuth1Session) -> Optional[str]:
+_pending_uploads: Dict[str, Tuple[asyncio.Task, float]] = {}
+
+MAX_REPLY_LENGTH = 280
+_HASHTAG_PATTERN = re.compile(r"(?<!\w)#\w+")
+
+
+def prepare_reply_text(reply_text: Optional[str]) -> Optional[str]:
+    """
+    Normalizes reply text before posting: drops hashtags (the character must
+    not use them), collapses whitespace and trims to MAX_REPLY_LENGTH on a
+    word boundary. Returns None if nothing postable is left.
+    """
+    if not reply_text:
+        return None
+    text = _HASHTAG_PATTERN.sub("", str(reply_text))
+    text = re.sub(r"[ \t]+", " ", text).strip()
+    if len(text) > MAX_REPLY_LENGTH:
+        cut = text[:MAX_REPLY_LENGTH - 1]
+        text = (cut.rsplit(" ", 1)[0] if " " in cut else cut).rstrip() + "…"
+    return text or None
+
+
+async def _upload_media_to_twitter(image_path: str, client: AsyncTwitterClient,
+                                   media_bytes: Optional[bytes] = None) -> Optional[str]:
     """
     Upload media to Twitter and return the media_id_string.
-    Uses Twitter API v1.1 for media upload.
+    Uses Twitter API v1.1 for media upload: a single request for small
+    images, the chunked INIT/APPEND/FINALIZE flow for anything larger.
+    If media_bytes is given, the file is not read from disk.
     """
     logger.info(f"POST_REPLY_TOOL: Uploading media: {image_path}")
-    media_upload_url = "https://upload.twitter.com/1.1/media/upload.json"
 
     try:
-        with open(image_path, 'rb') as image_file:
-            loop = asyncio.get_running_loop()
-
-            # Simple upload for images
-            files_for_upload = {'media': image_file}
-            upload_response = await loop.run_in_executor(
-                None,
-                lambda: oauth.post(media_upload_url, files=files_for_upload)
-            )
-            upload_response.raise_for_status()
-
-            uploaded_media_data = upload_response.json()
-            media_id_string = uploaded_media_data.get('media_id_string')
-
-            if media_id_string:
-                logger.info(f"POST_REPLY_TOOL: Media uploaded successfully. Media ID: {media_id_string}")
-                return media_id_string
-            else:
-                logger.error(f"POST_REPLY_TOOL: Media upload failed. Response: {upload_response.text}")
-                return None
+        media_type = mimetypes.guess_type(image_path)[0] or ""
+        file_size = len(media_bytes) if media_bytes is not None else os.path.getsize(image_path)
+        if file_size > MEDIA_CHUNKED_UPLOAD_THRESHOLD_MB * 1024 * 1024 or not media_type.startswith("image/"):
+            media_id_string = await client.upload_media_chunked(image_path, media_type or None, media_bytes)
+            logger.info(f"POST_REPLY_TOOL: Media uploaded successfully (chunked). Media ID: {media_id_string}")
+            return media_id_string
+
+        # Simple upload for small images
+        upload_response = await client.upload_media_simple(image_path, media_bytes)
+        upload_response.raise_for_status()
+
+        uploaded_media_data = upload_response.json()
+        media_id_string = uploaded_media_data.get('media_id_string')
+
+        if media_id_string:
+            logger.info(f"POST_REPLY_TOOL: Media uploaded successfully. Media ID: {media_id_string}")
+            return media_id_string
+        else:
+            logger.error(f"POST_REPLY_TOOL: Media upload failed. Response: {upload_response.text}")
+            return None
 
     except FileNotFoundError:
         logger.error(f"POST_REPLY_TOOL: Image file not found: {image_path}")
@@ -58,11 +100,57 @@ async def _upload_media_to_twitter(image_path: str, oauth: OAuth1Session) -> Opt
     except httpx.HTTPStatusError as e:
         logger.error(f"POST_REPLY_TOOL: HTTP error during media upload: {e.response.status_code}")
         return None
+    except MediaUploadError as e:
+        logger.error(f"POST_REPLY_TOOL: Chunked media upload failed: {e}")
+        return None
     except Exception as e:
         logger.exception(f"POST_REPLY_TOOL: Unexpected error during media upload: {e}")
         return None
 
 
+def _credentials_configured() -> bool:
+    return all([TWITTER_CONSUMER_KEY, TWITTER_CONSUMER_SECRET, TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_TOKEN_SECRET])
+
+
+def _prune_pending_uploads():
+    cutoff = time.monotonic() - _PENDING_UPLOAD_TTL_SECONDS
+    for path, (task, started_at) in list(_pending_uploads.items()):
+        if started_at < cutoff:
+            task.cancel()
+            del _pending_uploads[path]
+
+
+def start_media_pre_upload(image_path: str, media_bytes: Optional[bytes] = None) -> Optional[asyncio.Task]:
+    """
+    Starts uploading a freshly written image in the background and registers
+    the pending media_id under its path for post_tweet_reply to pick up.
+    Pass media_bytes when the image is already in memory.
+    Does nothing in dry-run mode or without Twitter credentials.
+    """
+    if not MEDIA_PRE_UPLOAD_ENABLED or not _credentials_configured():
+        return None
+    if os.getenv("DRY_RUN_MODE", "false").lower() == "true":
+        return None
+
+    _prune_pending_uploads()
+    task = asyncio.create_task(_upload_media_to_twitter(image_path, get_twitter_client(), media_bytes))
+    _pending_uploads[os.path.abspath(image_path)] = (task, time.monotonic())
+    logger.info(f"POST_REPLY_TOOL: Started media pre-upload for {image_path}")
+    return task
+
+
+async def _get_media_id(image_path: str, client: AsyncTwitterClient) -> Optional[str]:
+    """Awaits a pending pre-upload for the image if there is one, otherwise uploads now."""
+    pending = _pending_uploads.pop(os.path.abspath(image_path), None)
+    if pending:
+        media_id_string = await pending[0]
+        if media_id_string:
+            logger.info(f"POST_REPLY_TOOL: Using pre-uploaded media {media_id_string} for {image_path}")
+            return media_id_string
+        logger.warning("POST_REPLY_TOOL: Media pre-upload failed; retrying upload.")
+    return await _upload_media_to_twitter(image_path, client)
+
+
 async def post_tweet_reply(
     tweet_id_to_reply_to: str,
     reply_text: str,
@@ -83,19 +171,17 @@ async def post_tweet_reply(
     logger.info(f"POST_REPLY_TOOL: Posting reply to tweet ID: {tweet_id_to_reply_to}")
     logger.info(f"POST_REPLY_TOOL: Image path: {image_path}")
 
+    if not reply_text or not str(reply_text).strip():
+        logger.error(f"POST_REPLY_TOOL: Refusing to post an empty reply to tweet ID: {tweet_id_to_reply_to}")
+        return {"status": "error", "message": "Reply text is missing; nothing was posted."}
+
     # Validate credentials
-    if not all([TWITTER_CONSUMER_KEY, TWITTER_CONSUMER_SECRET, 
-                TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_TOKEN_SECRET]):
+    if not _credentials_configured():
         logger.error("POST_REPLY_TOOL: Twitter API credentials are incomplete.")
         return {"status": "error", "message": "Twitter API credentials missing."}
 
-    # Create OAuth session
-    oauth = OAuth1Session(
-        TWITTER_CONSUMER_KEY,
-        client_secret=TWITTER_CONSUMER_SECRET,
-        resource_owner_key=TWITTER_ACCESS_TOKEN,
-        resource_owner_secret=TWITTER_ACCESS_TOKEN_SECRET
-    )
+    # Shared async client (OAuth 1.0a signing over pooled connections)
+    client = get_twitter_client()
 
     # Build payload
     payload = {
@@ -110,7 +196,7 @@ async def post_tweet_reply(
 
     # Upload media if provided
     if image_path:
-        media_id_string = await _upload_media_to_twitter(image_path, oauth)
+        media_id_string = await _get_media_id(image_path, client)
         if media_id_string:
             payload["media"] = {"media_ids": [media_id_string]}
             posted_image_url = f"media_id_{media_id_string}_posted"
@@ -119,11 +205,7 @@ async def post_tweet_reply(
 
     # Post the tweet
     try:
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: oauth.post("https://api.twitter.com/2/tweets", json=payload)
-        )
+        response = await client.post_tweet(payload)
 
         response.raise_for_status()
         response_data = response.json()
@@ -3,11 +3,21 @@ Image Prompt Formatter Agent
 =============================
 Transforms high-level image concepts into detailed prompts for AI image generation.
 Ensures consistent visual identity for the character.
+
+PromptAssemblyStep is the code-only counterpart used in single-call mode:
+it combines the scene written by the character agent with the character's
+visual config, without another LLM call.
 """
 
+import re
 import logging
+from functools import lru_cache
+from typing import Dict, Any
 from google.adk.agents.llm_agent import LlmAgent
 from ...constants import MODEL
+from ...shared_lib.callbacks import skip_completed_stage
+from ...shared_lib.tool_step import ToolStep
+from ...shared_lib.utils import parse_json_output
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +41,7 @@ prompt_formatter_agent = LlmAgent(
     description="Receives an image concept idea. If an image is needed, it crafts a highly detailed prompt for an image generator, ensuring Nekira's consistent visual identity while adapting her pose, expression, and surroundings to the specific concept idea. Incorporates Nekira's core visual style.",
     tools=[],
     output_key="image_generation_params",
+    before_agent_callback=skip_completed_stage("image_generation_params"),
     instruction=f"""## Your Role: Nekira's Master Visual Scene Director & Prompt Engineer
 
 You are Nekira's personal AI assistant, responsible for translating her high-level image ideas into master-level, detailed prompts for an advanced image generation model (e.g., Replicate Flux, SDXL-based). Your goal is to maintain Nekira's consistent visual identity while adapting her to specific scenarios.
@@ -49,7 +60,7 @@ You are Nekira's personal AI assistant, responsible for translating her high-lev
 **Step 1: Parse Inputs**
     a. Let `character_output_json_str = session.state.get('character_agent_output_json', '{{}}')`.
     b. Parse `character_output_json_str` into `parsed_char_output`. Handle parsing errors by setting `generate_image_flag = false` and providing an error status.
-    c. `final_reply_text_val = parsed_char_output.get('reply_text', "Error: Reply text missing.")`
+    c. `final_reply_text_val = parsed_char_output.get('reply_text')` // Leave it null if missing; never substitute placeholder text, it would be posted as the reply.
     d. `image_is_needed_from_char = parsed_char_output.get('image_needed', false)`
     e. `image_concept_idea_from_char = parsed_char_output.get('image_concept_idea')` // This is a high-level idea.
 
@@ -102,4 +113,89 @@ You are Nekira's personal AI assistant, responsible for translating her high-lev
 
     b. Your final output MUST be this `output_bundle` dictionary, serialized as a JSON string.
 """
-)
\ No newline at end of file
+)
+
+
+@lru_cache(maxsize=1)
+def load_character_visuals() -> Dict[str, str]:
+    """
+    Visual identity of the active character from characters/<name>/visual_config.py,
+    falling back to the built-in Nekira constants when it is unavailable.
+    """
+    try:
+        from config import load_visual_config
+        visuals = load_visual_config()
+        if visuals.get("base_description"):
+            return visuals
+    except (ImportError, ValueError, FileNotFoundError) as e:
+        logger.warning(f"PROMPT_ASSEMBLY: Visual config unavailable ({e}); using built-in Nekira description.")
+    return {
+        "base_description": NEKARA_BASE_DESCRIPTION,
+        "background_style": NEKARA_BACKGROUND_STYLE_INFO,
+        "personality_context": NEKARA_PERSONALITY_FOR_IMAGE_CONTEXT,
+    }
+
+
+def assemble_image_prompt(scene: str, visuals: Dict[str, str]) -> str:
+    """Base appearance, then the scene, then background and art style, as one paragraph."""
+    sections = [visuals.get("base_description", ""), scene, visuals.get("background_style", "")]
+    text = " ".join(section.strip().rstrip(".") + "." for section in sections if section and section.strip())
+    # Visual configs list features as "- item" lines; fold them into the sentence,
+    # dropping any comma the item already ends with so separators aren't doubled
+    text = re.sub(r"^\s*-\s+(.*?)[\s,]*$", r"\1,", text, flags=re.MULTILINE)
+    return re.sub(r"\s+", " ", text)
+
+
+class PromptAssemblyStep(ToolStep):
+    """Builds image_generation_params from the single-call character output, in code."""
+
+    async def run_step(self, ctx) -> Dict[str, Any]:
+        character_output = parse_json_output(ctx.session.state.get("character_agent_output_json"))
+        prep_results = parse_json_output(ctx.session.state.get("tweet_prep_results"))
+
+        prefix = prep_results.get("analysis_id", "unknown_analysis") if prep_results else "error_prep_parse"
+        if not character_output:
+            return {
+                "final_reply_text": None,
+                "generate_this_image": False,
+                "actual_image_prompt_for_generation": None,
+                "image_name_prefix": prefix,
+                "image_aspect_ratio": "1:1",
+                "image_output_format": "jpg",
+                "formatter_status_message": "Skipped: could not parse character output.",
+            }
+
+        reply_text = character_output.get("reply_text")
+        if not reply_text or not str(reply_text).strip():
+            # Nothing to post; the post step refuses a missing reply instead of posting a placeholder
+            return {
+                "final_reply_text": None,
+                "generate_this_image": False,
+                "actual_image_prompt_for_generation": None,
+                "image_name_prefix": prefix,
+                "image_aspect_ratio": "1:1",
+                "image_output_format": "jpg",
+                "formatter_status_message": "Skipped: character output has no reply text.",
+            }
+
+        scene = character_output.get("image_scene") or character_output.get("image_concept")
+        generate = bool(character_output.get("image_needed")) and bool(scene and str(scene).strip())
+        return {
+            "final_reply_text": reply_text,
+            "generate_this_image": generate,
+            "actual_image_prompt_for_generation": assemble_image_prompt(scene, load_character_visuals()) if generate else None,
+            "image_name_prefix": prefix,
+            "image_aspect_ratio": "1:1",
+            "image_output_format": "jpg",
+            "formatter_status_message": (
+                "Prompt assembled from character scene and visual config." if generate
+                else "Skipped: Image not needed or concept idea was empty."
+            ),
+        }
+
+
+prompt_assembly_step = PromptAssemblyStep(
+    name="PromptAssemblyStep",
+    description="Assembles the image generation prompt in code from the character's scene and visual config.",
+    output_key="image_generation_params"
+)
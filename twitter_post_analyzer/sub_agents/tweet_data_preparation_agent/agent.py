@@ -2,11 +2,18 @@
 Tweet Data Preparation Agent
 =============================
 Fetches and processes tweet data, including media and link analysis.
+Available as an LlmAgent and as a deterministic step that calls the tool directly.
 """
 
+import logging
+from typing import Dict, Any
 from google.adk.agents import LlmAgent
 from ...constants import MODEL
-from .tools.tweet_processor_tool import process_tweet_fully_tool
+from ...shared_lib.callbacks import skip_completed_stage
+from ...shared_lib.tool_step import ToolStep
+from .tools.tweet_processor_tool import process_tweet_fully_tool, process_tweet_and_generate_report
+
+logger = logging.getLogger(__name__)
 
 tweet_data_preparation_agent = LlmAgent(
     name="TweetDataPreparationAgent",
@@ -16,6 +23,7 @@ tweet_data_preparation_agent = LlmAgent(
         process_tweet_fully_tool
     ],
     output_key="tweet_prep_results",
+    before_agent_callback=skip_completed_stage("tweet_prep_results"),
     instruction='''## Role
 You are the **TweetDataPreparationAgent**. Your sole responsibility is to process a given `tweet_url`.
 
@@ -29,4 +37,24 @@ You are the **TweetDataPreparationAgent**. Your sole responsibility is to proces
     Agent State: Tool completed. Received `tool_output_data`.
 6.  Your final response MUST be the exact `tool_output_data` (which will be a JSON string representation of the dictionary returned by the tool, handled by the system). Do not add any other text, explanations, or formatting. The system will save this string to `session.state.tweet_prep_results`.
 '''
-)
\ No newline at end of file
+)
+
+
+class TweetDataPreparationStep(ToolStep):
+    """Processes the tweet URL from the user message without an LLM round trip."""
+
+    async def run_step(self, ctx) -> Dict[str, Any]:
+        parts = ctx.user_content.parts if ctx.user_content and ctx.user_content.parts else []
+        tweet_url = "".join(part.text or "" for part in parts).strip()
+        if not tweet_url:
+            logger.error("TWEET_PREP_STEP: No tweet URL in the user message.")
+            return {"status": "error", "message": "No tweet URL provided.", "analysis_id": None,
+                    "main_post_id_to_reply_to": None, "report_markdown_content": None}
+        return await process_tweet_and_generate_report(tweet_url)
+
+
+tweet_data_preparation_step = TweetDataPreparationStep(
+    name="TweetDataPreparationStep",
+    description="Calls process_tweet_and_generate_report for the tweet URL and saves its output to session.state.tweet_prep_results.",
+    output_key="tweet_prep_results"
+)
@@ -3,7 +3,7 @@
 import asyncio
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from pathlib import Path
 from google.adk.tools import FunctionTool  # Import FunctionTool
 
@@ -14,6 +14,71 @@ from ....processing_pipeline.video_analyzer import analyze_video_content
 from ....processing_pipeline.link_analyzer import analyze_link_content
 from ....processing_pipeline.report_compiler import compile_tweet_report_markdown
 
+# Separate concurrency limits per analysis kind (Gemini vision vs. search)
+IMAGE_ANALYSIS_CONCURRENCY = int(os.getenv("IMAGE_ANALYSIS_CONCURRENCY", "4"))
+VIDEO_ANALYSIS_CONCURRENCY = int(os.getenv("VIDEO_ANALYSIS_CONCURRENCY", "2"))
+LINK_ANALYSIS_CONCURRENCY = int(os.getenv("LINK_ANALYSIS_CONCURRENCY", "4"))
+
+
+async def _run_bounded_analysis(semaphore: asyncio.Semaphore, analyze, *args) -> Dict[str, Any]:
+    """Run one analysis under its concurrency limit, turning exceptions into an error result."""
+    async with semaphore:
+        try:
+            return await analyze(*args)
+        except Exception as e:
+            print(f"PROCESS_TWEET_TOOL_LOGIC: Analysis error in {analyze.__name__}: {e}")
+            return {"error": str(e)}
+
+
+async def analyze_all_posts(extracted_data_result: Dict[str, Any]) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    Analyzes all media and links of all posts concurrently.
+    Returns image, video and link results, each in original post/item order.
+    """
+    image_limiter = asyncio.Semaphore(IMAGE_ANALYSIS_CONCURRENCY)
+    video_limiter = asyncio.Semaphore(VIDEO_ANALYSIS_CONCURRENCY)
+    link_limiter = asyncio.Semaphore(LINK_ANALYSIS_CONCURRENCY)
+
+    image_items, image_tasks = [], []
+    video_items, video_tasks = [], []
+    link_items, link_tasks = [], []
+
+    for post_data in extracted_data_result.get("all_posts_structured", []):
+        post_id = post_data["post_id"]
+        tweet_text_for_context = post_data["text"]
+        for media_item in post_data.get("media_to_analyze", []):
+            if media_item["type"] == "photo":
+                image_items.append({"post_id": post_id, **media_item})
+                image_tasks.append(_run_bounded_analysis(
+                    image_limiter, analyze_image_content,
+                    media_item['local_path'], tweet_text_for_context, media_item.get('content_sha256')
+                ))
+            elif media_item["type"] == "video":
+                video_items.append({"post_id": post_id, **media_item})
+                video_tasks.append(_run_bounded_analysis(
+                    video_limiter, analyze_video_content,
+                    media_item['local_path'], tweet_text_for_context, media_item.get('content_sha256')
+                ))
+        for link_item in post_data.get("links_to_analyze", []):
+            link_items.append({"post_id": post_id, **link_item})
+            link_tasks.append(_run_bounded_analysis(
+                link_limiter, analyze_link_content, link_item['url'], link_item['tweet_text_context']
+            ))
+
+    # gather() preserves input order, so results line up with their items
+    image_results, video_results, link_results = await asyncio.gather(
+        asyncio.gather(*image_tasks),
+        asyncio.gather(*video_tasks),
+        asyncio.gather(*link_tasks),
+    )
+
+    return (
+        [{**item, "analysis": res} for item, res in zip(image_items, image_results)],
+        [{**item, "analysis": res} for item, res in zip(video_items, video_results)],
+        [{**item, "analysis": res} for item, res in zip(link_items, link_results)],
+    )
+
+
 # Function remains unchanged (no ToolContext in arguments, returns dictionary)
 async def process_tweet_and_generate_report(tweet_url: str) -> Dict[str, Any]:
     """
@@ -41,23 +106,11 @@ async def process_tweet_and_generate_report(tweet_url: str) -> Dict[str, Any]:
 
     print(f"PROCESS_TWEET_TOOL_LOGIC: Data extracted for ID: {analysis_id}. Main Post ID: {main_post_id_to_reply_to}")
 
-    all_image_analysis_results = []
-    all_video_analysis_results = []
-    all_link_analysis_results = []
-
-    for post_data in extracted_data_result.get("all_posts_structured", []):
-        post_id = post_data["post_id"]
-        tweet_text_for_context = post_data["text"]
-        for media_item in post_data.get("media_to_analyze", []):
-            if media_item["type"] == "photo":
-                img_res = await analyze_image_content(media_item['local_path'], tweet_text_for_context)
-                all_image_analysis_results.append({"post_id": post_id, **media_item, "analysis": img_res})
-            elif media_item["type"] == "video":
-                vid_res = await analyze_video_content(media_item['local_path'], tweet_text_for_context)
-                all_video_analysis_results.append({"post_id": post_id, **media_item, "analysis": vid_res})
-        for link_item in post_data.get("links_to_analyze", []):
-            link_res = await analyze_link_content(link_item['url'], link_item['tweet_text_context'])
-            all_link_analysis_results.append({"post_id": post_id, **link_item, "analysis": link_res})
+    (
+        all_image_analysis_results,
+        all_video_analysis_results,
+        all_link_analysis_results,
+    ) = await analyze_all_posts(extracted_data_result)
 
     comprehensive_data = {
         "analysis_id": analysis_id,
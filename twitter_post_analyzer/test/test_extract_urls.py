@@ -0,0 +1,98 @@
+# test_extract_urls.py
+# URL extraction correctness plus pathological inputs that made the old regex backtrack.
+#   PYTHONPATH=. python -m pytest twitter_post_analyzer/test/test_extract_urls.py -q
+# Micro-benchmark (old regex vs current extractor):
+#   PYTHONPATH=. python twitter_post_analyzer/test/test_extract_urls.py
+import re
+import time
+
+from twitter_post_analyzer.processing_pipeline.data_extractor import extract_urls, extract_tweet_urls
+
+# The nested-quantifier pattern extract_urls used before, kept for the benchmark
+LEGACY_URL_REGEX = re.compile(r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»""'']))")
+
+TYPICAL_TWEET = (
+    "Neo-Kyodo is glitching again 🌧️ full thread: https://t.co/AbCdEf1234 "
+    "(mirror: https://example.com/news/2077/rain?src=tw) and www.cyber-tales.net, "
+    "plus docs at docs.example.org/guide/intro! #cyberpunk @nekira"
+)
+
+PATHOLOGICAL_INPUTS = {
+    "trailing_punctuation": "http://a.com/" + "!" * 50_000 + " ",
+    "dotted_run": "a." * 50_000,
+    "open_parens": "http://a.com/" + "(a" * 50_000,
+    "closing_brackets": "https://a.com/x" + ")" * 50_000,
+    "no_spaces": "x" * 100_000,
+}
+
+
+def test_extracts_urls_in_order():
+    assert extract_urls(TYPICAL_TWEET) == [
+        "https://t.co/AbCdEf1234",
+        "https://example.com/news/2077/rain?src=tw",
+        "www.cyber-tales.net",
+        "docs.example.org/guide/intro",
+    ]
+
+
+def test_trims_punctuation_but_keeps_balanced_brackets():
+    assert extract_urls("see https://en.wikipedia.org/wiki/Foo_(bar). nice") == ["https://en.wikipedia.org/wiki/Foo_(bar)"]
+    assert extract_urls("(link: https://a.com/x)") == ["https://a.com/x"]
+    assert extract_urls("<https://a.com/c>, \"https://b.com/?q=1&r=2\"") == ["https://a.com/c", "https://b.com/?q=1&r=2"]
+    assert extract_urls("check:https://t.co/abc…") == ["https://t.co/abc"]
+
+
+def test_ignores_non_urls():
+    assert extract_urls("no links here. a.b and e.g. this") == []
+    assert extract_urls("http:// https://") == []
+
+
+def test_prefers_tweet_entities():
+    tweet = {
+        "text": "look https://t.co/one",
+        "entities": {"urls": [
+            {"url": "https://t.co/one", "expanded_url": "https://example.com/one"},
+            {"url": "https://t.co/two"},
+        ]},
+    }
+    assert extract_tweet_urls(tweet) == ["https://example.com/one", "https://t.co/two"]
+    assert extract_tweet_urls({"text": "look https://a.com/x", "entities": {"urls": []}}) == ["https://a.com/x"]
+
+
+def test_pathological_inputs_run_in_linear_time():
+    for name, text in PATHOLOGICAL_INPUTS.items():
+        started = time.perf_counter()
+        extract_urls(text)
+        elapsed = time.perf_counter() - started
+        assert elapsed < 0.5, f"{name} took {elapsed:.2f}s"
+
+
+def _best_of(func, text, repeat=5, number=200):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func(text)
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def benchmark():
+    legacy = lambda text: [match[0] for match in LEGACY_URL_REGEX.findall(text)]
+    print(f"{'input':<32}{'legacy':>14}{'current':>14}")
+    cases = {
+        "typical tweet": TYPICAL_TWEET,
+        # Small enough for the legacy regex to finish: its time grows ~12x per 4 extra characters
+        "trailing punctuation (n=18)": "http://a.com/" + "!" * 18 + " ",
+        "dotted run (n=2000)": "a." * 2000,
+        "trailing punctuation (n=50k)": PATHOLOGICAL_INPUTS["trailing_punctuation"],
+    }
+    for name, text in cases.items():
+        number = 200 if text is TYPICAL_TWEET else 3
+        legacy_time = "skipped" if "50k" in name else f"{_best_of(legacy, text, repeat=3, number=number) * 1e6:.1f} us"
+        current_time = f"{_best_of(extract_urls, text, repeat=3, number=number) * 1e6:.1f} us"
+        print(f"{name:<32}{legacy_time:>14}{current_time:>14}")
+
+
+if __name__ == "__main__":
+    benchmark()
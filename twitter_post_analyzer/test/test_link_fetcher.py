@@ -0,0 +1,209 @@
+# test_link_fetcher.py
+# Runs the page-fetch link engine against a local aiohttp server:
+#   PYTHONPATH=. python -m pytest twitter_post_analyzer/test/test_link_fetcher.py -q
+import asyncio
+import socket
+
+import pytest
+from aiohttp import web
+
+from twitter_post_analyzer.processing_pipeline import link_fetcher
+from twitter_post_analyzer.shared_lib import http_clients
+from twitter_post_analyzer.shared_lib.http_clients import close_http_clients
+
+ARTICLE_PAGE = """<!doctype html>
+<html><head>
+  <title>Fallback title</title>
+  <meta property="og:title" content="Neon Rain Over Neo-Kyodo">
+  <meta property="og:description" content="A short story about a rainy night.">
+  <meta property="og:site_name" content="Cyber Tales">
+  <meta name="description" content="Plain meta description">
+  <script>var ignored = "should not appear";</script>
+</head><body>
+  <nav><ul><li>Home</li><li>About us and everything else</li></ul></nav>
+  <article>
+    <h1>Neon Rain Over Neo-Kyodo</h1>
+    <p>The rain never stopped in the lower districts, and the neon signs bled into the puddles.</p>
+    <p>Nekira watched the holographic billboards flicker from the rooftop, waiting for the signal.</p>
+    <p>When it came, it was not a message at all, but a glitch that only she could read.</p>
+  </article>
+  <footer><p>Copyright and unrelated footer text</p></footer>
+</body></html>
+"""
+
+LONG_PAGE = "<html><head><title>Long read</title></head><body><main>" + (
+    "<p>" + "This paragraph is long enough to count as real content. " * 10 + "</p>"
+) * 10 + "</main></body></html>"
+
+
+class FakeTextModel:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content_async(self, parts):
+        self.prompts.append(parts[0])
+
+        class Response:
+            text = " LLM summary of the page. "
+        return Response()
+
+
+async def _with_server(routes, check):
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        await check(f"http://127.0.0.1:{port}")
+    finally:
+        await close_http_clients()
+        await runner.cleanup()
+
+
+def test_extracts_metadata_and_main_text_without_llm(monkeypatch):
+    model = FakeTextModel()
+    monkeypatch.setattr(link_fetcher, "get_text_model", lambda: model)
+
+    async def article(request):
+        return web.Response(text=ARTICLE_PAGE, content_type="text/html")
+
+    async def redirect(request):
+        raise web.HTTPFound("/article")
+
+    async def check(base_url):
+        result = await link_fetcher.analyze_link_by_fetch(f"{base_url}/short", "tweet", allow_private_hosts=True)
+        assert result["error"] is None
+        page = result["page"]
+        assert page["final_url"] == f"{base_url}/article"
+        assert page["title"] == "Neon Rain Over Neo-Kyodo"
+        assert page["description"] == "A short story about a rainy night."
+        assert page["site_name"] == "Cyber Tales"
+        assert page["summary_source"] == "metadata"
+        assert result["summary"].startswith("Neon Rain Over Neo-Kyodo - A short story")
+        assert result["search_results"][0]["link"] == f"{base_url}/article"
+        assert model.prompts == []
+
+    asyncio.run(_with_server({"/article": article, "/short": redirect}, check))
+
+
+def test_main_text_skips_navigation_scripts_and_footer():
+    info = link_fetcher.extract_page_info(ARTICLE_PAGE)
+    text = info["main_text"]
+    assert "neon signs bled into the puddles" in text
+    assert "only she could read" in text
+    assert "About us" not in text
+    assert "should not appear" not in text
+    assert "Copyright" not in text
+
+
+def test_long_page_is_summarized_by_llm(monkeypatch):
+    model = FakeTextModel()
+    monkeypatch.setattr(link_fetcher, "get_text_model", lambda: model)
+
+    async def long_page(request):
+        return web.Response(text=LONG_PAGE, content_type="text/html")
+
+    async def check(base_url):
+        result = await link_fetcher.analyze_link_by_fetch(f"{base_url}/long", "tweet context", allow_private_hosts=True)
+        assert result["summary"] == "LLM summary of the page."
+        assert result["page"]["summary_source"] == "llm"
+        assert len(model.prompts) == 1
+        # Summaries are cached per URL, so the tweet must not leak into the prompt
+        assert "tweet context" not in model.prompts[0]
+
+    asyncio.run(_with_server({"/long": long_page}, check))
+
+
+def test_size_cap_truncates_body(monkeypatch):
+    monkeypatch.setattr(link_fetcher, "LINK_FETCH_MAX_BYTES", 1024)
+
+    async def big_page(request):
+        return web.Response(text="<html><body>" + "<p>x</p>" * 10000 + "</body></html>", content_type="text/html")
+
+    async def check(base_url):
+        fetched = await link_fetcher.fetch_page(f"{base_url}/big", allow_private_hosts=True)
+        assert fetched["truncated"] is True
+        assert len(fetched["html"]) == 1024
+
+    asyncio.run(_with_server({"/big": big_page}, check))
+
+
+def test_rejects_non_html_and_errors():
+    async def image(request):
+        return web.Response(body=b"\x89PNG", content_type="image/png")
+
+    async def missing(request):
+        raise web.HTTPNotFound()
+
+    async def check(base_url):
+        for path, expected in (("/image", "not an HTML page"), ("/missing", "HTTP 404")):
+            result = await link_fetcher.analyze_link_by_fetch(f"{base_url}{path}", "tweet", allow_private_hosts=True)
+            assert result["summary"] is None
+            assert expected in result["error"]
+
+    asyncio.run(_with_server({"/image": image, "/missing": missing}, check))
+
+
+def test_private_hosts_refused_by_default():
+    async def check():
+        result = await link_fetcher.analyze_link_by_fetch("http://127.0.0.1:1/", "tweet", allow_private_hosts=False)
+        assert "private address" in result["error"]
+        result = await link_fetcher.analyze_link_by_fetch("http://169.254.169.254/latest/", "tweet", allow_private_hosts=False)
+        assert "private address" in result["error"]
+
+    asyncio.run(check())
+
+
+class FakeDnsResolver:
+    """Stands in for aiohttp.ThreadedResolver with fixed answers."""
+
+    ANSWERS = {
+        "internal.test": ["127.0.0.1"],
+        "metadata.test": ["169.254.169.254"],
+        "mixed.test": ["93.184.216.34", "10.0.0.5"],
+        "mapped.test": ["::ffff:192.168.1.1"],
+        "public.test": ["93.184.216.34"],
+    }
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        return [
+            {"hostname": host, "host": address, "port": port, "family": socket.AF_INET6 if ":" in address else socket.AF_INET,
+             "proto": 0, "flags": socket.AI_NUMERICHOST}
+            for address in self.ANSWERS[host]
+        ]
+
+    async def close(self):
+        pass
+
+
+def test_public_resolver_refuses_any_private_answer(monkeypatch):
+    monkeypatch.setattr(http_clients.aiohttp, "ThreadedResolver", FakeDnsResolver)
+
+    async def check():
+        resolver = http_clients.PublicAddressResolver()
+        for host in ("internal.test", "metadata.test", "mixed.test", "mapped.test"):
+            with pytest.raises(http_clients.PrivateAddressError):
+                await resolver.resolve(host, 80)
+        assert [result["host"] for result in await resolver.resolve("public.test", 80)] == ["93.184.216.34"]
+
+    asyncio.run(check())
+
+
+def test_hostnames_resolving_to_private_addresses_are_refused(monkeypatch):
+    monkeypatch.setattr(http_clients.aiohttp, "ThreadedResolver", FakeDnsResolver)
+
+    async def page(request):
+        return web.Response(text=ARTICLE_PAGE, content_type="text/html")
+
+    async def check(base_url):
+        port = base_url.rsplit(":", 1)[1]
+        # The server is up on 127.0.0.1, but the name pointing at it must not be fetched
+        result = await link_fetcher.analyze_link_by_fetch(f"http://internal.test:{port}/", "tweet", allow_private_hosts=False)
+        assert result["summary"] is None
+        assert "private address 127.0.0.1" in result["error"]
+
+    asyncio.run(_with_server({"/": page}, check))
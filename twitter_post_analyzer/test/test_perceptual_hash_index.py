@@ -0,0 +1,97 @@
+# test_perceptual_hash_index.py
+# dHash stability and Hamming-radius lookups in the perceptual hash index:
+#   PYTHONPATH=. python -m pytest twitter_post_analyzer/test/test_perceptual_hash_index.py -q
+import io
+import random
+
+from PIL import Image, ImageDraw
+
+from twitter_post_analyzer.processing_pipeline.perceptual_hash_index import (
+    CHUNK_BITS, CHUNK_COUNT, HASH_BITS, PerceptualHashIndex, chunk_variants, split_hash,
+)
+from twitter_post_analyzer.shared_lib.llm_utils import compute_image_dhash
+
+NAMESPACE = "vision-model:image-v2"
+
+
+def _hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _flip(phash, bits):
+    for bit in bits:
+        phash ^= 1 << bit
+    return phash
+
+
+def _bits_in_chunks(flips_per_chunk):
+    """Bit positions to flip: flips_per_chunk[i] distinct bits inside chunk i (most significant chunk first)."""
+    bits = []
+    for i, count in enumerate(flips_per_chunk):
+        low = CHUNK_BITS * (CHUNK_COUNT - 1 - i)
+        bits.extend(low + offset for offset in range(count))
+    return bits
+
+
+def _scene(seed):
+    rng = random.Random(seed)
+    image = Image.new("RGB", (320, 240), (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(300), rng.randrange(220)
+        draw.rectangle((x, y, x + rng.randrange(20, 120), y + rng.randrange(20, 90)),
+                       fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return image
+
+
+def test_dhash_is_stable_across_resize_and_reencode():
+    original = _scene(1)
+    buffer = io.BytesIO()
+    original.resize((160, 120)).save(buffer, format="JPEG", quality=70)
+    buffer.seek(0)
+    with Image.open(buffer) as copy:
+        copy_hash = compute_image_dhash(copy)
+    original_hash = compute_image_dhash(original)
+
+    assert 0 <= original_hash < 2 ** HASH_BITS
+    assert _hamming(original_hash, copy_hash) <= 6
+    assert _hamming(original_hash, compute_image_dhash(_scene(2))) > 6
+
+
+def test_split_hash_and_chunk_variants():
+    phash = 0x0123_4567_89AB_CDEF
+    assert split_hash(phash) == [0x0123, 0x4567, 0x89AB, 0xCDEF]
+
+    variants = chunk_variants(0x0F0F, 1)
+    assert variants[0] == 0x0F0F
+    assert len(variants) == len(set(variants)) == 1 + CHUNK_BITS
+    assert all(_hamming(variant, 0x0F0F) <= 1 for variant in variants)
+    assert len(chunk_variants(0, 2)) == 1 + CHUNK_BITS + CHUNK_BITS * (CHUNK_BITS - 1) // 2
+
+
+def test_find_exact_within_and_outside_radius(tmp_path):
+    index = PerceptualHashIndex(db_path=tmp_path / "index.sqlite3", max_distance=6)
+    stored = 0xA5A5_5A5A_F00F_0FF0
+    index.add(stored, NAMESPACE, {"description": "a cat on a roof"})
+
+    assert index.find(stored, NAMESPACE) == (0, {"description": "a cat on a roof"})
+
+    # 6 flips spread over every chunk: only one chunk is within the 1-bit probe radius
+    within = _flip(stored, _bits_in_chunks([2, 2, 1, 1]))
+    assert index.find(within, NAMESPACE) == (6, {"description": "a cat on a roof"})
+
+    # 7 flips: the row is still a chunk candidate, but the full distance is over the limit
+    outside = _flip(stored, _bits_in_chunks([2, 2, 2, 1]))
+    assert _hamming(stored, outside) == 7
+    assert index.find(outside, NAMESPACE) is None
+
+
+def test_find_returns_closest_match_and_respects_namespace(tmp_path):
+    index = PerceptualHashIndex(db_path=tmp_path / "index.sqlite3", max_distance=6)
+    query = 0x1234_5678_9ABC_DEF0
+    index.add(_flip(query, _bits_in_chunks([1, 1, 1, 1])), NAMESPACE, {"description": "farther"})
+    index.add(_flip(query, _bits_in_chunks([1, 0, 0, 0])), NAMESPACE, {"description": "closer"})
+
+    assert index.find(query, NAMESPACE) == (1, {"description": "closer"})
+    # Entries written under another model or prompt version are never reused
+    assert index.find(query, "vision-model:image-v1") is None
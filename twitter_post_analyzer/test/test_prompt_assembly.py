@@ -0,0 +1,21 @@
+# test_prompt_assembly.py
+# Folding of "- item" visual config lines into the assembled image prompt.
+#   PYTHONPATH=. python -m pytest twitter_post_analyzer/test/test_prompt_assembly.py -q
+from twitter_post_analyzer.sub_agents.prompt_formatter_agent.agent import assemble_image_prompt
+
+
+def test_sections_joined_in_order():
+    visuals = {"base_description": "A cat girl.", "background_style": "Anime style"}
+    assert assemble_image_prompt("She waves", visuals) == "A cat girl. She waves. Anime style."
+
+
+def test_item_lines_folded_with_single_separator():
+    visuals = {
+        "base_description": "A cat girl with:\n- silver hair\n- red eyes",
+        "background_style": "Setting:\n- Neo-Kyodo in 2077,\n- neon rain ,  \n- night",
+    }
+    prompt = assemble_image_prompt("She waves", visuals)
+    assert ",," not in prompt
+    assert ", ," not in prompt
+    assert "silver hair, red eyes" in prompt
+    assert "Neo-Kyodo in 2077, neon rain, night" in prompt